@@ -2,6 +2,29 @@
 import os
 import sys
 
+import pytest
+
 ROOT = os.path.dirname(__file__)
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
+
+
+def pytest_addoption(parser):
+    parser.addoption("--e2e", action="store_true", default=False, help="run the Playwright/browser E2E tests")
+
+
+def pytest_collection_modifyitems(config, items):
+    # Browser tests are opt-in: without --e2e they are skipped before any server/browser fixture runs
+    if config.getoption("--e2e"):
+        # The E2E server runs in-process and points DB_FILE at its own database for the whole
+        # session, so an --e2e run is E2E only; unit tests need a separate pytest run
+        selected = [item for item in items if "playwright" in item.keywords]
+        deselected = [item for item in items if "playwright" not in item.keywords]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+        return
+    skip = pytest.mark.skip(reason="E2E test; run with --e2e")
+    for item in items:
+        if "playwright" in item.keywords:
+            item.add_marker(skip)
@@ -7,5 +7,6 @@
 
 __version__ = "0.1.0"
 
-# Convenience re-export: allow importing the FastAPI app as endpoint_pulse.app.app
-# (the actual app is defined in endpoint_pulse.app)
+# The FastAPI app lives in endpoint_pulse.app (import it as endpoint_pulse.app:app).
+# It is deliberately not imported here, so importing the package (e.g. for the
+# CLI runner) does not pull in FastAPI.
@@ -23,20 +23,40 @@ import asyncio
 import re
 import ssl
 import socket
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from urllib.parse import urlparse
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from urllib.parse import parse_qsl, urlparse, urlsplit
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import httpx
 import sqlite3
 from fastapi import FastAPI, HTTPException, Request, Form, UploadFile, File
-from fastapi.responses import HTMLResponse, RedirectResponse, Response
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.datastructures import FormData
 from pydantic import BaseModel, Field, HttpUrl
 
 
+# Connection pool limits for the shared probe client
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+
+def _new_probe_client() -> httpx.AsyncClient:
+    """
+    Creates the AsyncClient used for probing.
+
+    The client's cookie jar accepts no cookies, so a long-lived (pooled) client
+    never sends cookies set by one probe along with a later one.
+
+    Returns:
+        httpx.AsyncClient: A new, unopened probe client.
+    """
+    jar = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+    return httpx.AsyncClient(timeout=httpx.Timeout(10), follow_redirects=True, limits=HTTP_LIMITS, cookies=jar)
+
 
 def _resolve_db_file() -> Path:
     """
@@ -64,14 +84,18 @@ def _get_conn() -> sqlite3.Connection:
     Establishes a connection to the SQLite database.
 
     Ensures the parent directory for the database file exists and enables foreign key
-    support for the connection.
+    support for the connection. A DB_FILE starting with "file:" is opened as an SQLite URI
+    (e.g. "file:pulse?mode=memory&cache=shared" for a shared in-memory database).
 
     Returns:
         sqlite3.Connection: A connection object to the database.
     """
-    db_file = _resolve_db_file()
-    db_file.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(db_file))
+    db_file = str(_resolve_db_file())
+    if db_file.startswith("file:"):
+        conn = sqlite3.connect(db_file, uri=True)
+    else:
+        Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_file)
     conn.row_factory = sqlite3.Row
     # Enforce foreign keys
     conn.execute("PRAGMA foreign_keys = ON;")
@@ -136,6 +160,8 @@ def _load_data() -> Dict[str, Any]:
         cur.execute("SELECT id, name FROM folders ORDER BY id;")
         folders_rows = cur.fetchall()
         folders: List[Dict[str, Any]] = []
+        folder_rows: List[tuple] = []
+        node_rows: List[tuple] = []
         for frow in folders_rows:
             fid = int(frow["id"])
             cur.execute(
@@ -155,6 +181,10 @@ def _load_data() -> Dict[str, Any]:
                 for nr in nodes_rows
             ]
             folders.append({"id": fid, "name": frow["name"], "nodes": nodes})
+            folder_rows.append((fid, frow["name"]))
+            node_rows.extend(
+                (n["id"], fid, n["name"], n["url"], n["comment"], 1 if n["active"] else 0) for n in nodes
+            )
         # Determine next ids from meta or max+1
         def _get_meta(key: str) -> Optional[int]:
             cur.execute("SELECT value FROM meta WHERE key=?;", (key,))
@@ -173,49 +203,80 @@ def _load_data() -> Dict[str, Any]:
         if next_node_id is None:
             cur.execute("SELECT COALESCE(MAX(id)+1, 1) AS next_id FROM nodes;")
             next_node_id = int(cur.fetchone()["next_id"])
+        # Remember what is stored so that saving identical data can be skipped
+        _remember_saved((folder_rows, node_rows, next_folder_id, next_node_id))
         return {"next_folder_id": next_folder_id, "next_node_id": next_node_id, "folders": folders}
 
 
+# Content rows (folder rows, node rows, next folder id, next node id)
+_Snapshot = Tuple[List[tuple], List[tuple], int, int]
+
+# (database file, snapshot) of the content last loaded from or written to the database
+_last_saved: Optional[Tuple[str, _Snapshot]] = None
+
+
+def _remember_saved(snapshot: _Snapshot) -> None:
+    """Record the rows currently stored in the active database file."""
+    global _last_saved
+    _last_saved = (str(_resolve_db_file()), snapshot)
+
+
 def _save_data(data: Dict[str, Any]) -> None:
-    """Replace database content with provided structure and persist counters."""
-    # Ensure schema exists (safety for tests or direct calls)
-    _init_db()
+    """Replace database content with provided structure and persist counters.
+
+    The write is skipped when the content is identical to what was last loaded
+    from or written to the same database file (e.g. no-op edits).
+    """
     folders = data.get("folders", []) or []
     next_folder_id = int(data.get("next_folder_id", 1) or 1)
     next_node_id = int(data.get("next_node_id", 1) or 1)
+    folder_rows: List[tuple] = []
+    node_rows: List[tuple] = []
+    for f in folders:
+        fid = int(f.get("id"))
+        folder_rows.append((fid, f.get("name", "")))
+        for n in (f.get("nodes") or []):
+            node_rows.append((
+                int(n.get("id")),
+                fid,
+                n.get("name", ""),
+                n.get("url", ""),
+                n.get("comment", ""),
+                1 if bool(n.get("active", True)) else 0,
+            ))
+    snapshot = (folder_rows, node_rows, next_folder_id, next_node_id)
+    if _last_saved == (str(_resolve_db_file()), snapshot):
+        return
+    # Ensure schema exists (safety for tests or direct calls)
+    _init_db()
     with _get_conn() as conn:
         cur = conn.cursor()
         # Wipe
         cur.execute("DELETE FROM nodes;")
         cur.execute("DELETE FROM folders;")
-        # Insert folders
-        for f in folders:
-            cur.execute("INSERT INTO folders(id, name) VALUES(?, ?);", (int(f.get("id")), f.get("name", "")))
-            for n in (f.get("nodes") or []):
-                cur.execute(
-                    """
-                    INSERT INTO nodes(id, folder_id, name, url, comment, active)
-                    VALUES(?, ?, ?, ?, ?, ?);
-                    """,
-                    (
-                        int(n.get("id")),
-                        int(f.get("id")),
-                        n.get("name", ""),
-                        n.get("url", ""),
-                        n.get("comment", ""),
-                        1 if bool(n.get("active", True)) else 0,
-                    ),
-                )
+        # Insert folders and nodes
+        cur.executemany("INSERT INTO folders(id, name) VALUES(?, ?);", folder_rows)
+        cur.executemany(
+            """
+            INSERT INTO nodes(id, folder_id, name, url, comment, active)
+            VALUES(?, ?, ?, ?, ?, ?);
+            """,
+            node_rows,
+        )
         # Upsert meta
         cur.execute("INSERT INTO meta(key,value) VALUES('next_folder_id',?) ON CONFLICT(key) DO UPDATE SET value=excluded.value;", (str(next_folder_id),))
         cur.execute("INSERT INTO meta(key,value) VALUES('next_node_id',?) ON CONFLICT(key) DO UPDATE SET value=excluded.value;", (str(next_node_id),))
         conn.commit()
+    _remember_saved(snapshot)
 
 
 # Pydantic models
+NAME_MAX_LENGTH = 200
+
+
 class NodeIn(BaseModel):
     """Pydantic model for creating a new node."""
-    name: str = Field(min_length=1, max_length=200)
+    name: str = Field(min_length=1, max_length=NAME_MAX_LENGTH)
     url: HttpUrl
     comment: Optional[str] = ""
     active: bool = True
@@ -229,7 +290,7 @@ class Node(NodeIn):
 
 class FolderIn(BaseModel):
     """Pydantic model for creating a new folder."""
-    name: str = Field(min_length=1, max_length=200)
+    name: str = Field(min_length=1, max_length=NAME_MAX_LENGTH)
 
 
 class Folder(FolderIn):
@@ -239,8 +300,6 @@ class Folder(FolderIn):
 
 
 # Initialize app with lifespan to init DB once
-from contextlib import asynccontextmanager
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -253,7 +312,13 @@ async def lifespan(app: FastAPI):
     """
     # Initialize database schema once at startup (reduces per-request overhead)
     _init_db()
-    yield
+    # Shared HTTP client so probes reuse pooled (keep-alive) connections across requests and runs
+    async with _new_probe_client() as client:
+        app.state.http = client
+        try:
+            yield
+        finally:
+            app.state.http = None
 
 app = FastAPI(title="Endpoint Pulse", version="0.1.0", lifespan=lifespan)
 
@@ -267,6 +332,55 @@ templates_dir.mkdir(parents=True, exist_ok=True)
 app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 templates = Jinja2Templates(directory=str(templates_dir))
 
+# Target size of the pieces sent by _stream_template
+STREAM_CHUNK_SIZE = 32 * 1024
+
+
+def _batched(pieces: Iterable[str], size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Joins small rendered pieces into chunks of roughly `size` characters.
+
+    Args:
+        pieces (Iterable[str]): The rendered template pieces.
+        size (int): The minimum chunk size before a chunk is emitted.
+
+    Yields:
+        str: The joined chunks; the last one may be smaller.
+    """
+    buf: List[str] = []
+    buffered = 0
+    for piece in pieces:
+        buf.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield "".join(buf)
+            buf.clear()
+            buffered = 0
+    if buf:
+        yield "".join(buf)
+
+
+def _stream_template(request: Request, name: str, ctx: Dict[str, Any]) -> StreamingResponse:
+    """
+    Renders a template as a streamed HTML response.
+
+    Uses Jinja's generate() so chunks are sent as they are rendered instead of
+    building the whole page in memory first (useful for large result tables).
+    The per-token output of generate() is batched into STREAM_CHUNK_SIZE pieces
+    to keep the number of ASGI send() calls low.
+
+    Args:
+        request (Request): The incoming request.
+        name (str): The template name.
+        ctx (Dict[str, Any]): The template context.
+
+    Returns:
+        StreamingResponse: The streamed HTML page.
+    """
+    ctx.setdefault("request", request)
+    template = templates.get_template(name)
+    return StreamingResponse(_batched(template.generate(ctx)), media_type="text/html")
+
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request, folder_id: Optional[int] = None, node_id: Optional[int] = None):
@@ -315,6 +429,57 @@ async def index(request: Request, folder_id: Optional[int] = None, node_id: Opti
 
 # Helper finders
 
+def _is_http_url(url: str) -> bool:
+    """
+    Cheap URL shape check used by the HTML forms instead of a full Pydantic model.
+
+    Args:
+        url (str): The (already stripped) URL.
+
+    Returns:
+        bool: True for absolute http(s) URLs with a host, a valid port and no whitespace.
+    """
+    if not url or any(ch.isspace() for ch in url):
+        return False
+    try:
+        parts = urlsplit(url)
+        # .port raises ValueError for non-numeric or out-of-range ports
+        parts.port
+    except ValueError:
+        return False
+    return parts.scheme.lower() in ("http", "https") and bool(parts.hostname)
+
+
+# Matches node_id/folder_id parameters in a query string (first value per key wins)
+_SELECTION_PARAM_RE = re.compile(r"(?:^|&)(node_id|folder_id)=([^&]*)")
+
+
+def _selection_target(query: str) -> Optional[str]:
+    """
+    Derives a GET redirect target from the node_id/folder_id of a query string.
+
+    Scans the query once instead of parsing it into a dict. A numeric node_id
+    takes precedence over a numeric folder_id.
+
+    Args:
+        query (str): The raw query string (e.g. of a referer URL).
+
+    Returns:
+        Optional[str]: "/?node_id=N" or "/?folder_id=N", or None if neither is present.
+    """
+    first: Dict[str, str] = {}
+    for key, value in _SELECTION_PARAM_RE.findall(query or ""):
+        if value and key not in first:
+            first[key] = value
+    node_id = first.get("node_id", "")
+    if node_id.isdigit():
+        return f"/?node_id={node_id}"
+    folder_id = first.get("folder_id", "")
+    if folder_id.isdigit():
+        return f"/?folder_id={folder_id}"
+    return None
+
+
 def _find_folder(data: Dict[str, Any], folder_id: int) -> Optional[Dict[str, Any]]:
     """
     Finds a folder by its ID.
@@ -446,45 +611,140 @@ def _probe_url(url: str, timeout_seconds: int = 10) -> Dict[str, Any]:
         return result
 
 
-async def _aprobes(urls: List[str], timeout_seconds: int = 10) -> List[Dict[str, Any]]:
+async def _aprobes(
+    urls: List[str], timeout_seconds: int = 10, client: Optional[httpx.AsyncClient] = None
+) -> List[Dict[str, Any]]:
     """
     Probes multiple URLs concurrently.
 
     Args:
         urls (List[str]): A list of URLs to probe.
         timeout_seconds (int): The timeout for each request in seconds.
+        client (Optional[httpx.AsyncClient]): Client to use; defaults to the shared
+                                              application client (see _probe_client).
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries containing the probe results.
     """
+    timeout = httpx.Timeout(timeout_seconds)
+
     async def fetch_one(client: httpx.AsyncClient, url: str) -> Dict[str, Any]:
         t0 = time.perf_counter()
         try:
-            resp = await client.get(url)
+            resp = await client.get(url, timeout=timeout)
             elapsed_ms = int((time.perf_counter() - t0) * 1000)
             res = {"ok": resp.is_success, "status_code": resp.status_code, "elapsed_ms": elapsed_ms}
-            try:
-                ssl_info = _get_ssl_cert_info(url, timeout_seconds=timeout_seconds)
-                res.update(ssl_info)
-            except Exception:
-                pass
-            return res
         except Exception as e:
             elapsed_ms = int((time.perf_counter() - t0) * 1000)
             res = {"ok": False, "error": str(e), "elapsed_ms": elapsed_ms}
-            try:
-                ssl_info = _get_ssl_cert_info(url, timeout_seconds=timeout_seconds)
-                res.update(ssl_info)
-            except Exception:
-                pass
-            return res
+        # The certificate check uses blocking sockets; run it in a worker thread
+        try:
+            ssl_info = await asyncio.to_thread(_get_ssl_cert_info, url, timeout_seconds)
+            res.update(ssl_info)
+        except Exception:
+            pass
+        return res
 
-    timeout = httpx.Timeout(timeout_seconds)
-    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
+    if client is not None:
+        return await asyncio.gather(*[fetch_one(client, u) for u in urls])
+    async with _probe_client() as client:
         tasks = [fetch_one(client, u) for u in urls]
         return await asyncio.gather(*tasks)
 
 
+@asynccontextmanager
+async def _probe_client():
+    """
+    Provides an httpx.AsyncClient for probing.
+
+    Yields the pooled client created by the application lifespan. If the lifespan
+    has not run (e.g. a TestClient used without a ``with`` block), a short-lived
+    client is created and closed on exit instead.
+    """
+    shared = getattr(app.state, "http", None)
+    if shared is not None:
+        yield shared
+        return
+    async with _new_probe_client() as client:
+        yield client
+
+
+def _result_row(
+    node: Dict[str, Any],
+    probe: Optional[Dict[str, Any]] = None,
+    fetch: str = "parallel",
+    stats: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Build a single test-results row for a node in one dict construction.
+
+    Inactive nodes become a skipped row; active nodes merge the probe result,
+    the fetch mode and optional per-node stats. Keys are only present when a
+    value is known, since the template checks them with ``is defined``.
+    """
+    active = bool(node.get("active", True))
+    if not active:
+        return {
+            "id": node.get("id"),
+            "name": node.get("name"),
+            "url": node.get("url"),
+            "active": False,
+            "tested": False,
+            "reason": "Node inactive",
+            "fetch": "skipped",
+            **(stats or {}),
+        }
+    return {
+        "id": node.get("id"),
+        "name": node.get("name"),
+        "url": node.get("url"),
+        "active": True,
+        **(probe or {}),
+        "fetch": fetch,
+        **(stats or {}),
+    }
+
+
+def _aggregate_measurements(measurements: List[Dict[str, Any]]) -> Dict[int, Dict[str, int]]:
+    """Aggregate per-node timing stats and error counts in a single pass.
+
+    Returns a mapping of node id to a dict with "errors" and, if at least one
+    integer elapsed_ms was recorded for the node, "avg_ms", "min_ms" and "max_ms".
+    """
+    # Per node: [count, total, min, max, errors]
+    acc: Dict[int, List[float]] = {}
+    for m in measurements:
+        try:
+            nid = int(m.get("id") or 0)
+        except Exception:
+            nid = 0
+        if not nid:
+            continue
+        ms = m.get("elapsed_ms")
+        ok = m.get("ok", False)
+        a = acc.get(nid)
+        if a is None:
+            a = acc[nid] = [0.0, 0.0, float("inf"), float("-inf"), 0.0]
+        if isinstance(ms, int):
+            a[0] += 1
+            a[1] += ms
+            if ms < a[2]:
+                a[2] = ms
+            if ms > a[3]:
+                a[3] = ms
+        if not ok:
+            a[4] += 1
+
+    stats_map: Dict[int, Dict[str, int]] = {}
+    for nid, (count, total, lo, hi, errors) in acc.items():
+        st = {"errors": int(errors)}
+        if count:
+            st["avg_ms"] = int(round(total / count))
+            st["min_ms"] = int(lo)
+            st["max_ms"] = int(hi)
+        stats_map[nid] = st
+    return stats_map
+
+
 def _build_chart_stats(results: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Build improved geometry for a cleaner inline SVG chart.
     - Adds margins, proper axes, "nice" y-ticks, and an average line.
@@ -799,7 +1059,7 @@ async def test_node(node_id: int) -> Dict[str, Any]:
         return {"id": node_id, "active": False, "tested": False, "reason": "Node inactive"}
 
     url = n["url"]
-    res = _probe_url(url)
+    res = (await _aprobes([url]))[0]
     res.update({"id": node_id, "url": url})
     return res
 
@@ -842,20 +1102,7 @@ async def test_folder(folder_id: int) -> Dict[str, Any]:
         next_map[i] = res
 
     for idx, n in enumerate(nodes):
-        row = {
-            "id": n.get("id"),
-            "name": n.get("name"),
-            "url": n.get("url"),
-            "active": bool(n.get("active", True)),
-        }
-        if not row["active"]:
-            row.update({"tested": False, "reason": "Node inactive", "fetch": "skipped"})
-        else:
-            probe = next_map.get(idx, {})
-            probe = dict(probe)
-            probe["fetch"] = "parallel"
-            row.update(probe)
-        results.append(row)
+        results.append(_result_row(n, next_map.get(idx)))
 
     return {"folder_id": folder_id, "results": results}
 
@@ -1000,9 +1247,7 @@ async def form_add_node(
     comment = (comment or "").strip()
     if not name or not url:
         return RedirectResponse(url=f"/?folder_id={folder_id}", status_code=303)
-    try:
-        node_in = NodeIn(name=name, url=url, comment=comment, active=bool(active))
-    except Exception:
+    if len(name) > NAME_MAX_LENGTH or not _is_http_url(url):
         # If validation fails, keep focus on the folder
         return RedirectResponse(url=f"/?folder_id={folder_id}", status_code=303)
     data = _load_data()
@@ -1014,10 +1259,10 @@ async def form_add_node(
     new_node = {
         "id": node_id,
         "folder_id": folder_id,
-        "name": node_in.name,
-        "url": str(node_in.url),
-        "comment": node_in.comment or "",
-        "active": bool(node_in.active),
+        "name": name,
+        "url": url,
+        "comment": comment,
+        "active": bool(active),
     }
     f.setdefault("nodes", []).append(new_node)
     _save_data(data)
@@ -1056,15 +1301,13 @@ async def form_edit_node(
     comment = (comment or "").strip()
     if not name or not url:
         return RedirectResponse(url=f"/?node_id={node_id}", status_code=303)
-    try:
-        node_in = NodeIn(name=name, url=url, comment=comment, active=bool(active))
-    except Exception:
+    if len(name) > NAME_MAX_LENGTH or not _is_http_url(url):
         return RedirectResponse(url=f"/?node_id={node_id}", status_code=303)
     target.update({
-        "name": node_in.name,
-        "url": str(node_in.url),
-        "comment": node_in.comment or "",
-        "active": bool(node_in.active),
+        "name": name,
+        "url": url,
+        "comment": comment,
+        "active": bool(active),
     })
     _save_data(data)
     return RedirectResponse(url=f"/?node_id={node_id}", status_code=303)
@@ -1098,35 +1341,18 @@ async def form_delete_node(node_id: int):
     raise HTTPException(status_code=404, detail="Node not found")
 
 
-@app.post("/nodes/bulk_delete")
-async def form_bulk_delete(request: Request):
-    """Delete selected nodes (node_ids) or all nodes in a folder.
-    Accepts application/x-www-form-urlencoded where node_ids can appear multiple times.
+def _collect_node_ids(form: Any) -> Tuple[List[str], List[int]]:
     """
-    data = _load_data()
-
-    # Parse posted form data via Starlette's form parser (robust for urlencoded and multipart)
-    form = await request.form()
+    Collects node ids posted as repeated node_ids (or node_ids[]) form fields.
 
-    # folder context (optional)
-    folder_id: Optional[int] = None
-    try:
-        if form.get("folder_id") is not None and str(form.get("folder_id")).isdigit():
-            folder_id = int(str(form.get("folder_id")))
-    except Exception:
-        folder_id = None
+    Values may also contain several ids separated by commas or whitespace.
 
-    # Delete all flag
-    delete_all_in_folder = form.get("delete_all_in_folder")
-    if delete_all_in_folder and folder_id is not None:
-        folder = _find_folder(data, folder_id)
-        if not folder:
-            raise HTTPException(status_code=404, detail="Folder not found")
-        folder["nodes"] = []
-        _save_data(data)
-        return RedirectResponse(url=f"/?folder_id={folder_id}", status_code=303)
+    Args:
+        form (Any): Parsed form data supporting get() and getlist().
 
-    # Collect node_ids from repeated fields
+    Returns:
+        Tuple[List[str], List[int]]: The raw posted values and the parsed integer ids.
+    """
     vals: List[str] = []
     # getlist captures duplicates; also try get() for parsers that collapse
     for key in ("node_ids", "node_ids[]"):
@@ -1162,6 +1388,60 @@ async def form_bulk_delete(request: Request):
                     norm_ids.append(int(p))
                 except Exception:
                     pass
+    return vals, norm_ids
+
+
+async def _read_form(request: Request) -> Any:
+    """
+    Reads posted form data.
+
+    application/x-www-form-urlencoded bodies are read once and parsed with
+    parse_qsl, skipping Starlette's form parser machinery. Other content types
+    (e.g. multipart) fall back to request.form().
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        FormData: The parsed form fields.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/"):
+        return await request.form()
+    body = await request.body()
+    return FormData(parse_qsl(body.decode("utf-8", errors="replace"), keep_blank_values=True))
+
+
+@app.post("/nodes/bulk_delete")
+async def form_bulk_delete(request: Request):
+    """Delete selected nodes (node_ids) or all nodes in a folder.
+    Accepts application/x-www-form-urlencoded where node_ids can appear multiple times.
+    """
+    data = _load_data()
+
+    # Parse posted form data; urlencoded bodies are parsed directly, multipart via Starlette
+    form = await _read_form(request)
+
+    # folder context (optional)
+    folder_id: Optional[int] = None
+    try:
+        if form.get("folder_id") is not None and str(form.get("folder_id")).isdigit():
+            folder_id = int(str(form.get("folder_id")))
+    except Exception:
+        folder_id = None
+
+    # Delete all flag
+    delete_all_in_folder = form.get("delete_all_in_folder")
+    if delete_all_in_folder and folder_id is not None:
+        folder = _find_folder(data, folder_id)
+        if not folder:
+            raise HTTPException(status_code=404, detail="Folder not found")
+        folder["nodes"] = []
+        _save_data(data)
+        return RedirectResponse(url=f"/?folder_id={folder_id}", status_code=303)
+
+    # Collect node_ids from repeated fields
+    vals, norm_ids = _collect_node_ids(form)
 
     to_delete = set(norm_ids)
     if not to_delete:
@@ -1191,11 +1471,18 @@ async def form_bulk_delete(request: Request):
         if not to_delete:
             return RedirectResponse(url=(f"/?folder_id={folder_id}" if folder_id is not None else "/"), status_code=303)
 
-    # Apply deletion across all folders
+    # Apply deletion across all folders (node ids are already ints as loaded by _load_data);
+    # stop as soon as every requested id has been removed
+    pending = len(to_delete)
     for f in data.get("folders", []):
+        if pending <= 0:
+            break
         nodes = f.get("nodes", [])
         if nodes:
-            f["nodes"] = [n for n in nodes if int(n.get("id")) not in to_delete]
+            kept = [n for n in nodes if n["id"] not in to_delete]
+            if len(kept) != len(nodes):
+                pending -= len(nodes) - len(kept)
+                f["nodes"] = kept
 
     _save_data(data)
 
@@ -1269,15 +1556,10 @@ async def form_toggle_node_active(request: Request, node_id: int):
     target_url = f"/?folder_id={n.get('folder_id')}"
     ref = request.headers.get("referer") or ""
     try:
-        from urllib.parse import urlparse, parse_qs
         pr = urlparse(ref)
         # If the referer path is not a POST-only endpoint, try to preserve selection from its query string.
         if not pr.path.endswith("/test/html"):
-            qs = parse_qs(pr.query or "")
-            if qs.get("node_id") and qs["node_id"][0].isdigit():
-                target_url = f"/?node_id={qs['node_id'][0]}"
-            elif qs.get("folder_id") and qs["folder_id"][0].isdigit():
-                target_url = f"/?folder_id={qs['folder_id'][0]}"
+            target_url = _selection_target(pr.query) or target_url
     except Exception:
         pass
 
@@ -1316,28 +1598,22 @@ async def form_test_node_html(request: Request, node_id: int, keep_folder_contex
         timeout_seconds = 120
 
     # Build a single-row results list consistent with folder test rows
-    row: Dict[str, Any] = {
-        "id": n.get("id"),
-        "name": n.get("name"),
-        "url": n.get("url"),
-        "active": bool(n.get("active", True)),
-    }
-    if not row["active"]:
-        row.update({"tested": False, "reason": "Node inactive", "fetch": "skipped"})
+    if not n.get("active", True):
+        row = _result_row(n)
     else:
-        probe = _probe_url(row["url"], timeout_seconds=timeout_seconds)  # includes ok, status_code, elapsed_ms or error
-        probe["fetch"] = "single"
-        row.update(probe)
+        # Probe via the shared async client so the event loop is not blocked
+        probe = (await _aprobes([n.get("url")], timeout_seconds=timeout_seconds))[0]  # includes ok, status_code, elapsed_ms or error
         # Provide single-run stats
-        if isinstance(row.get("elapsed_ms"), int):
-            row["avg_ms"] = row["elapsed_ms"]
-            row["min_ms"] = row["elapsed_ms"]
-            row["max_ms"] = row["elapsed_ms"]
+        st: Dict[str, Any] = {}
+        elapsed_ms = probe.get("elapsed_ms")
+        if isinstance(elapsed_ms, int):
+            st["avg_ms"] = st["min_ms"] = st["max_ms"] = elapsed_ms
         # For single run, errors is 0 if ok, else 1
-        if row.get("ok") is True:
-            row["errors"] = 0
-        elif (row.get("ok") is False) or (row.get("status_code") is not None) or (row.get("error") is not None):
-            row["errors"] = 1
+        if probe.get("ok") is True:
+            st["errors"] = 0
+        elif (probe.get("ok") is False) or (probe.get("status_code") is not None) or (probe.get("error") is not None):
+            st["errors"] = 1
+        row = _result_row(n, probe, fetch="single", stats=st)
 
     selected_folder = _find_folder(data, n.get("folder_id")) if n else None
     theme = request.cookies.get("theme", "light")
@@ -1359,6 +1635,66 @@ async def form_test_node_html(request: Request, node_id: int, keep_folder_contex
     return templates.TemplateResponse(request, "index.html", ctx)
 
 
+async def _run_node_tests(
+    nodes: List[Dict[str, Any]], runs_val: int, timeout_seconds: int
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Probes the active nodes runs_val times and builds the results table.
+
+    All active URLs are probed in parallel per round, reusing one HTTP client
+    across rounds. Table rows reflect the last round and carry avg/min/max and
+    error counts aggregated over all rounds.
+
+    Args:
+        nodes (List[Dict[str, Any]]): The nodes to test, in display order.
+        runs_val (int): The number of rounds to run.
+        timeout_seconds (int): The timeout for each request in seconds.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: The table rows and all
+        individual measurements (one per active node and round).
+    """
+    active_urls: List[str] = []
+    active_indices: List[int] = []
+    for idx, n in enumerate(nodes):
+        if bool(n.get("active", True)):
+            active_urls.append(n.get("url"))
+            active_indices.append(idx)
+
+    last_idx_to_result: Dict[int, Dict[str, Any]] = {}
+    all_measurements: List[Dict[str, Any]] = []
+
+    if active_urls:
+        async with _probe_client() as client:
+            for _ in range(runs_val):
+                round_results = await _aprobes(active_urls, timeout_seconds=timeout_seconds, client=client)
+                # Update last mapping
+                last_idx_to_result = {i: res for i, res in zip(active_indices, round_results)}
+                # Accumulate measurements for chart with simple rows (carry name for tooltip)
+                for i, res in zip(active_indices, round_results):
+                    node = nodes[i]
+                    m = dict(res)
+                    m["id"] = node.get("id")
+                    m["name"] = node.get("name")
+                    m["url"] = node.get("url")
+                    # Mark fetch type for potential UI (not required by chart)
+                    m["fetch"] = "parallel"
+                    all_measurements.append(m)
+
+    # Build per-node stats (avg/min/max and error counts) from all_measurements
+    stats_map = _aggregate_measurements(all_measurements)
+
+    # Build table rows from the last run (or skipped if inactive/no runs)
+    results: List[Dict[str, Any]] = []
+    for idx, n in enumerate(nodes):
+        # Attach stats and errors count per node across runs if available
+        st = stats_map.get(int(n.get("id") or 0))
+        if st is None and all_measurements:
+            st = {"errors": 0}
+        results.append(_result_row(n, last_idx_to_result.get(idx), stats=st))
+    return results, all_measurements
+
+
 @app.post("/folders/{folder_id}/test/html")
 async def form_test_folder_html(request: Request, folder_id: int, runs: Optional[int] = Form(None)):
     """
@@ -1371,7 +1707,7 @@ async def form_test_folder_html(request: Request, folder_id: int, runs: Optional
         runs (Optional[int]): The number of times to run the test.
 
     Returns:
-        TemplateResponse: The rendered HTML page with the test results.
+        StreamingResponse: The rendered HTML page with the test results, streamed.
     """
     data = _load_data()
     f = _find_folder(data, folder_id)
@@ -1389,12 +1725,6 @@ async def form_test_folder_html(request: Request, folder_id: int, runs: Optional
         timeout_seconds = 120
 
     nodes = f.get("nodes", []) or []
-    active_urls: List[str] = []
-    active_indices: List[int] = []
-    for idx, n in enumerate(nodes):
-        if bool(n.get("active", True)):
-            active_urls.append(n.get("url"))
-            active_indices.append(idx)
 
     # Determine number of repetitions
     runs_val = 1
@@ -1409,86 +1739,7 @@ async def form_test_folder_html(request: Request, folder_id: int, runs: Optional
         runs_val = 100
 
     # Execute runs_val rounds; keep last run for table and aggregate all measurements for the chart
-    last_idx_to_result: Dict[int, Dict[str, Any]] = {}
-    all_measurements: List[Dict[str, Any]] = []
-
-    if active_urls:
-        for _ in range(runs_val):
-            round_results = await _aprobes(active_urls, timeout_seconds=timeout_seconds)
-            # Update last mapping
-            last_idx_to_result = {i: res for i, res in zip(active_indices, round_results)}
-            # Accumulate measurements for chart with simple rows (carry name for tooltip)
-            for i, res in zip(active_indices, round_results):
-                node = nodes[i]
-                m = dict(res)
-                m["id"] = node.get("id")
-                m["name"] = node.get("name")
-                m["url"] = node.get("url")
-                # Mark fetch type for potential UI (not required by chart)
-                m["fetch"] = "parallel"
-                all_measurements.append(m)
-
-    # Build per-node stats from all_measurements
-    stats_map: Dict[int, Dict[str, int]] = {}
-    if all_measurements:
-        buckets: Dict[int, List[int]] = {}
-        for m in all_measurements:
-            nid = int(m.get("id") or 0)
-            if not nid:
-                continue
-            ms = m.get("elapsed_ms")
-            if isinstance(ms, int):
-                buckets.setdefault(nid, []).append(ms)
-        for nid, lst in buckets.items():
-            if lst:
-                stats_map[nid] = {
-                    "avg_ms": int(round(sum(lst) / len(lst))),
-                    "min_ms": int(min(lst)),
-                    "max_ms": int(max(lst)),
-                }
-
-    # Build table rows from the last run (or skipped if inactive/no runs)
-    results: List[Dict[str, Any]] = []
-    for idx, n in enumerate(nodes):
-        row = {
-            "id": n.get("id"),
-            "name": n.get("name"),
-            "url": n.get("url"),
-            "active": bool(n.get("active", True)),
-        }
-        if not row["active"]:
-            row.update({"tested": False, "reason": "Node inactive", "fetch": "skipped"})
-        else:
-            probe = dict(last_idx_to_result.get(idx, {}))
-            probe["fetch"] = "parallel"
-            row.update(probe)
-            # Attach stats if available
-            st = stats_map.get(int(row["id"]))
-            if st:
-                row.update(st)
-        results.append(row)
-
-    # Include errors count per node across runs
-    if all_measurements:
-        err_buckets: Dict[int, int] = {}
-        for m in all_measurements:
-            try:
-                nid = int(m.get("id") or 0)
-            except Exception:
-                nid = 0
-            if not nid:
-                continue
-            is_error = not bool(m.get("ok", False))
-            if is_error:
-                err_buckets[nid] = err_buckets.get(nid, 0) + 1
-        # attach errors to rows
-        for row in results:
-            try:
-                nid = int(row.get("id") or 0)
-            except Exception:
-                nid = 0
-            if nid:
-                row["errors"] = err_buckets.get(nid, 0)
+    results, all_measurements = await _run_node_tests(nodes, runs_val, timeout_seconds)
 
     theme = request.cookies.get("theme", "light")
     if theme not in ("light", "dark"):
@@ -1508,7 +1759,7 @@ async def form_test_folder_html(request: Request, folder_id: int, runs: Optional
         "timeout_seconds": timeout_seconds,
         "runs": runs_val,
     }
-    return templates.TemplateResponse(request, "index.html", ctx)
+    return _stream_template(request, "index.html", ctx)
 
 
 @app.post("/preferences")
@@ -1542,7 +1793,6 @@ async def set_preferences(request: Request, dark_mode: Optional[str] = Form(None
     # Compute a safe GET redirect target. Avoid redirecting back to POST-only paths like */test/html.
     target_url = referer or "/"
     try:
-        from urllib.parse import urlparse, parse_qs
         pr = urlparse(referer)
         path = pr.path or ""
         if path.endswith("/test/html"):
@@ -1555,11 +1805,7 @@ async def set_preferences(request: Request, dark_mode: Optional[str] = Form(None
                     target_url = f"/?node_id={parts[1]}"
         else:
             # Try to preserve selection from query string if present
-            qs = parse_qs(pr.query or "")
-            if qs.get("node_id") and qs["node_id"][0].isdigit():
-                target_url = f"/?node_id={qs['node_id'][0]}"
-            elif qs.get("folder_id") and qs["folder_id"][0].isdigit():
-                target_url = f"/?folder_id={qs['folder_id'][0]}"
+            target_url = _selection_target(pr.query) or target_url
     except Exception:
         pass
 
@@ -1631,42 +1877,9 @@ async def form_test_selected_html(request: Request, folder_id: int, runs: Option
     if timeout_seconds > 120:
         timeout_seconds = 120
 
-    # Parse posted form data for node_ids
+    # Parse posted form data for node_ids (already parsed and cached by FastAPI for the runs field)
     form = await request.form()
-    vals: List[str] = []
-    for key in ("node_ids", "node_ids[]"):
-        try:
-            if hasattr(form, "getlist"):
-                lst = form.getlist(key)
-                if lst:
-                    vals.extend(lst)
-        except Exception:
-            pass
-        v = form.get(key)
-        if v is not None:
-            if isinstance(v, (list, tuple)):
-                vals.extend(list(v))
-            else:
-                vals.append(str(v))
-
-    norm_ids: List[int] = []
-    for x in vals:
-        try:
-            if isinstance(x, (bytes, bytearray)):
-                s = x.decode("utf-8", errors="ignore")
-            else:
-                s = str(x)
-        except Exception:
-            s = str(x)
-        s = s.strip()
-        if not s:
-            continue
-        for p in re.split(r"[,\s]+", s):
-            if p.isdigit():
-                try:
-                    norm_ids.append(int(p))
-                except Exception:
-                    pass
+    vals, norm_ids = _collect_node_ids(form)
 
     selected_ids = [nid for nid in norm_ids if any(int(n.get("id")) == nid for n in (f.get("nodes") or []))]
     selected_ids = list(dict.fromkeys(selected_ids))  # de-duplicate, preserve order
@@ -1689,67 +1902,8 @@ async def form_test_selected_html(request: Request, folder_id: int, runs: Option
     if runs_val > 100:
         runs_val = 100
 
-    # Prepare active URLs and indices into the nodes list
-    active_urls: List[str] = []
-    active_indices: List[int] = []
-    for idx, n in enumerate(nodes):
-        if bool(n.get("active", True)):
-            active_urls.append(n.get("url"))
-            active_indices.append(idx)
-
-    # Execute runs
-    last_idx_to_result: Dict[int, Dict[str, Any]] = {}
-    all_measurements: List[Dict[str, Any]] = []
-
-    if active_urls:
-        for _ in range(runs_val):
-            round_results = await _aprobes(active_urls, timeout_seconds=timeout_seconds)
-            last_idx_to_result = {i: res for i, res in zip(active_indices, round_results)}
-            
-
-    # Aggregate stats across measurements
-    stats_map: Dict[int, Dict[str, int]] = {}
-    
-
-    # Build table rows from the last run or skipped if inactive
-    results: List[Dict[str, Any]] = []
-    for idx, n in enumerate(nodes):
-        row = {
-            "id": n.get("id"),
-            "name": n.get("name"),
-            "url": n.get("url"),
-            "active": bool(n.get("active", True)),
-        }
-        if not row["active"]:
-            row.update({"tested": False, "reason": "Node inactive", "fetch": "skipped"})
-        else:
-            probe = dict(last_idx_to_result.get(idx, {}))
-            probe["fetch"] = "parallel"
-            row.update(probe)
-            st = stats_map.get(int(row["id"]))
-            if st:
-                row.update(st)
-        results.append(row)
-
-    # Include per-node error counts across runs if any
-    if all_measurements:
-        err_buckets: Dict[int, int] = {}
-        for m in all_measurements:
-            try:
-                nid = int(m.get("id") or 0)
-            except Exception:
-                nid = 0
-            if not nid:
-                continue
-            if not bool(m.get("ok", False)):
-                err_buckets[nid] = err_buckets.get(nid, 0) + 1
-        for row in results:
-            try:
-                nid = int(row.get("id") or 0)
-            except Exception:
-                nid = 0
-            if nid:
-                row["errors"] = err_buckets.get(nid, 0)
+    # Execute runs; the table shows the last run, stats and chart cover all runs
+    results, all_measurements = await _run_node_tests(nodes, runs_val, timeout_seconds)
 
     theme = request.cookies.get("theme", "light")
     if theme not in ("light", "dark"):
@@ -5,6 +5,24 @@
 # This software is released under the WTFPL, Version 2.0.
 # See the LICENSE file for more details.
 
+import argparse
+import functools
+import os
+
+# Accepted (lower-cased) values for ENDPOINT_PULSE_RELOAD
+_TRUTHY = frozenset({"1", "true", "yes", "on"})
+
+
+@functools.lru_cache(maxsize=1)
+def _parser(default_host, default_port):
+    """Build the CLI parser; cached since defaults only change with the environment."""
+    parser = argparse.ArgumentParser(prog="endpoint-pulse", description="Run Endpoint Pulse (FastAPI) with uvicorn")
+    parser.add_argument("--host", "-H", dest="host", help=f"Host/IP to bind (default: %(default)s)", default=default_host)
+    parser.add_argument("--port", "-p", dest="port", type=int, help=f"Port to bind (default: %(default)s)", default=default_port)
+    parser.add_argument("--reload", action="store_true", help="Enable auto-reload (overrides env)")
+    return parser
+
+
 def main():
     """Run the Endpoint Pulse app with uvicorn.
 
@@ -16,10 +34,6 @@ def main():
     2) Environment variables ENDPOINT_PULSE_HOST/PORT/RELOAD
     3) Defaults: host=127.0.0.1, port=8000, reload=False
     """
-    import os
-    import argparse
-    import uvicorn
-
     # Defaults (lowest precedence)
     default_host = "127.0.0.1"
     default_port = 8000
@@ -31,17 +45,13 @@ def main():
     env_reload = os.environ.get("ENDPOINT_PULSE_RELOAD")
 
     # CLI (highest precedence)
-    parser = argparse.ArgumentParser(prog="endpoint-pulse", description="Run Endpoint Pulse (FastAPI) with uvicorn")
-    parser.add_argument("--host", "-H", dest="host", help=f"Host/IP to bind (default: %(default)s)", default=env_host or default_host)
-    parser.add_argument("--port", "-p", dest="port", type=int, help=f"Port to bind (default: %(default)s)", default=int(env_port) if env_port else default_port)
-    parser.add_argument("--reload", action="store_true", help="Enable auto-reload (overrides env)")
-    args = parser.parse_args()
+    args = _parser(env_host or default_host, int(env_port) if env_port else default_port).parse_args()
 
     # Reload: CLI flag wins; otherwise derive from env
-    if args.reload:
-        reload = True
-    else:
-        reload = str(env_reload).lower() in ("1", "true", "yes", "on")
+    reload = args.reload or (env_reload or "").strip().lower() in _TRUTHY
+
+    # Imported only once we know we are going to serve (--help/usage errors exit before this)
+    import uvicorn
 
     uvicorn.run("endpoint_pulse.app:app", host=args.host, port=args.port, reload=reload)
 
@@ -1,10 +1,11 @@
 import os
-import tempfile
+import sqlite3
 import contextlib
 import threading
 import time
-from pathlib import Path
+import urllib.parse
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
@@ -12,53 +13,164 @@ import endpoint_pulse.app as app_module
 
 
 
+@pytest.fixture(scope="session")
+def app():
+    # The FastAPI app (routes, templates) is built once when conftest imports the module, i.e.
+    # once per (xdist worker) process. Nothing in endpoint_pulse.app reads the environment at
+    # import time: DB_FILE/DATA_FILE are resolved on every connection, so the shared app always
+    # follows the database path set for the current worker/test.
+    return app_module.app
+
+
+@pytest.fixture(scope="session")
+def _session_db():
+    # In-memory database shared by the session-scoped client (one per xdist worker), emptied
+    # before every test by _reset_db. A shared-cache memory database lives as long as at least
+    # one connection is open, so keep one for the whole session.
+    uri = f"file:endpoint_pulse_{os.environ.get('PYTEST_XDIST_WORKER', 'main')}?mode=memory&cache=shared"
+    keeper = sqlite3.connect(uri, uri=True)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("DB_FILE", uri)
+        app_module._init_db()
+        yield uri
+    keeper.close()
+
+
+@pytest.fixture(scope="session")
+def app_client(app, _session_db):
+    # One client for the whole session (per xdist worker). Entering it runs the app lifespan
+    # once, so the shared outgoing httpx.AsyncClient and the client's ASGI transport and
+    # event-loop portal are reused by every test.
+    with WrappedTestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(autouse=True)
+def _reset_db(request):
+    # Start every test from an empty tree with fresh id counters and no cookies. Going through
+    # _save_data keeps its unchanged-content check in sync and is a no-op if already empty.
+    if request.node.get_closest_marker("no_db"):
+        return
+    app_client = request.getfixturevalue("app_client")
+    app_module._save_data({"folders": [], "next_folder_id": 1, "next_node_id": 1})
+    app_client.cookies.clear()
+
+
+@pytest.fixture()
+def client(app_client):
+    return app_client
+
+
 @pytest.fixture()
-def client(monkeypatch):
-    # Fresh client per test using a temporary database
-    with tempfile.TemporaryDirectory() as tmpdir:
-        db_path = Path(tmpdir) / "test.sqlite3"
-        monkeypatch.setenv("DB_FILE", str(db_path))
-        from endpoint_pulse.app import app  # import after env set
-        yield WrappedTestClient(app)
+async def async_client(app):
+    # Async client talking to the app in-process over ASGI (same session database as app_client)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as c:
+        yield c
+
+
+# Node fields not given to make_folder default to an active https://e.com node
+_NODE_DEFAULTS = {"url": "https://e.com", "comment": "", "active": True}
+
+
+@pytest.fixture()
+def make_folder():
+    # Factory: insert a folder plus nodes (dicts overriding _NODE_DEFAULTS) straight into the
+    # current database, in one _save_data transaction and without HTTP; returns (folder_id, [node_ids])
+    def _make(name="F", nodes=()):
+        data = app_module._load_data()
+        fid, first_nid = data["next_folder_id"], data["next_node_id"]
+        ids = list(range(first_nid, first_nid + len(nodes)))
+        data["folders"].append({
+            "id": fid,
+            "name": name,
+            "nodes": [{"id": nid, "folder_id": fid, **_NODE_DEFAULTS, **n} for nid, n in zip(ids, nodes)],
+        })
+        data["next_folder_id"] = fid + 1
+        data["next_node_id"] = first_nid + len(nodes)
+        app_module._save_data(data)
+        return fid, ids
+
+    return _make
+
+
+@pytest.fixture()
+def prod_folder_with_nodes(make_folder):
+    # Folder "Prod" with three active nodes N0..N2; returns (folder_id, [node_ids])
+    return make_folder("Prod", [{"name": f"N{i}"} for i in range(3)])
+
+
+@pytest.fixture(scope="session")
+def uniform_rows():
+    # Read-only chart rows by size; _build_chart_stats does not mutate its input
+    base = {"ok": True, "elapsed_ms": 1}
+    return {n: [base] * n for n in (120, 300, 600)}
+
+
+_FORM_CONTENT_TYPE = "application/x-www-form-urlencoded"
+
 
+def _form_body(data):
+    # url-encode; support list of tuples with doseq
+    return urllib.parse.urlencode(data, doseq=True).encode("utf-8"), _FORM_CONTENT_TYPE
+
+
+def _fast_urlencode(items):
+    # Percent-encode (str, str) pairs directly, skipping urlencode's per-value type dispatch
+    quote = urllib.parse.quote_from_bytes
+    return "&".join(
+        quote(k.encode("utf-8"), safe="") + "=" + quote(v.encode("utf-8"), safe="") for k, v in items
+    ).encode("ascii")
+
+
+def _dict_body(data):
+    # Common case: flat dict of string values; anything else goes through urlencode(doseq)
+    if all(type(v) is str for v in data.values()):
+        return _fast_urlencode(data.items()), _FORM_CONTENT_TYPE
+    return _form_body(data)
+
+
+# Encoders for raw/form `data=` payloads by exact type: data -> (body bytes, content-type or None)
+_BODY_DISPATCH = {
+    bytes: lambda d: (d, None),
+    bytearray: lambda d: (bytes(d), None),
+    str: lambda d: (d.encode("utf-8"), None),
+    dict: _dict_body,
+    list: _form_body,
+    tuple: _form_body,
+}
 
 
 class WrappedTestClient(TestClient):
     def _normalized_request(self, method, url, **kwargs):
+        # Plain GETs (the common case) have nothing to normalize
+        if method == "GET" and "allow_redirects" not in kwargs and "data" not in kwargs:
+            return super().request(method, url, **kwargs)
+
         # Map deprecated allow_redirects to follow_redirects to silence Starlette deprecation warnings
         if "allow_redirects" in kwargs and "follow_redirects" not in kwargs:
             kwargs["follow_redirects"] = bool(kwargs.pop("allow_redirects"))
 
         # If raw body provided via data (bytes/str) or classic form structures, move to content
         # to avoid httpx deprecation warning about using 'data=' for raw bytes.
-        if "content" not in kwargs:
-            data = kwargs.get("data", None)
-            files = kwargs.get("files", None)
-            json_arg = kwargs.get("json", None)
-            # Only transform when not uploading files and not JSON
-            if json_arg is None and not files and data is not None:
-                import urllib.parse
-                headers = dict(kwargs.get("headers") or {})
-                body_bytes = None
-                if isinstance(data, (bytes, bytearray)):
-                    body_bytes = bytes(data)
-                elif isinstance(data, str):
-                    body_bytes = data.encode("utf-8")
-                elif isinstance(data, (dict, list, tuple)):
-                    try:
-                        # url-encode; support list of tuples with doseq
-                        body_str = urllib.parse.urlencode(data, doseq=True)
-                        body_bytes = body_str.encode("utf-8")
-                        # set form content-type if not already set
-                        if not any(k.lower() == "content-type" for k in headers.keys()):
-                            headers["Content-Type"] = "application/x-www-form-urlencoded"
-                    except Exception:
-                        body_bytes = None
-                if body_bytes is not None:
-                    kwargs.pop("data", None)
-                    kwargs["content"] = body_bytes
-                    if headers:
-                        kwargs["headers"] = headers
+        # Only transform when not uploading files and not JSON.
+        data = kwargs.get("data")
+        if data is not None and "content" not in kwargs and kwargs.get("json") is None and not kwargs.get("files"):
+            encode = _BODY_DISPATCH.get(type(data))
+            if encode is not None:
+                body_bytes, content_type = encode(data)
+                del kwargs["data"]
+                kwargs["content"] = body_bytes
+                if content_type is not None:
+                    # set form content-type if not already set; caller headers are only
+                    # wrapped (httpx.Headers is case-insensitive) when there are any
+                    headers = kwargs.get("headers")
+                    if not headers:
+                        kwargs["headers"] = {"Content-Type": content_type}
+                    else:
+                        headers = httpx.Headers(headers)
+                        if "content-type" not in headers:
+                            headers["Content-Type"] = content_type
+                            kwargs["headers"] = headers
         return super().request(method, url, **kwargs)
 
     # Override verb helpers to avoid passing deprecated args into parent helpers
@@ -82,37 +194,86 @@ class WrappedTestClient(TestClient):
 
 
 
-class MockResp:
-    def __init__(self, status_code=200):
-        self.status_code = status_code
-        self.is_success = 200 <= status_code < 300
+# Prebuilt responses returned by the patched send(); the app only reads status_code/is_success
+_OK_RESP = httpx.Response(200)
+_FAIL_RESP = httpx.Response(404)
 
 
-@pytest.fixture()
-def mock_http_ok(monkeypatch):
-    import httpx
+def _respond_ok(url):
+    return _OK_RESP
 
-    def sync_get(self, url, *args, **kwargs):
-        return MockResp(200)
 
-    async def async_get(self, url, *args, **kwargs):
-        return MockResp(200)
+# Behaviour of the patched httpx send methods: a callable url -> response. Every test starts
+# from _respond_ok, so no test reaches the network by accident.
+_http_get = _respond_ok
+
+
+_REAL_SSL_CERT_INFO = app_module._get_ssl_cert_info
+
+
+def _no_ssl_cert_info(url, timeout_seconds=10):
+    return {}
 
-    monkeypatch.setattr(httpx.Client, "get", sync_get, raising=True)
-    monkeypatch.setattr(httpx.AsyncClient, "get", async_get, raising=True)
-    return True
+
+@pytest.fixture(scope="session", autouse=True)
+def _http_patch():
+    # Install the httpx patches once per session; tests override the behaviour via http_mode.
+    # send() sits below get()/request(), so every outgoing call is covered. Clients talking to
+    # the app itself (TestClient, or an AsyncClient over ASGITransport) always use the real send.
+    real_sync_send = httpx.Client.send
+    real_async_send = httpx.AsyncClient.send
+
+    def sync_send(self, request, *args, **kwargs):
+        if isinstance(self, TestClient):
+            return real_sync_send(self, request, *args, **kwargs)
+        return _http_get(request.url)
+
+    async def async_send(self, request, *args, **kwargs):
+        if isinstance(self._transport, httpx.ASGITransport):
+            return await real_async_send(self, request, *args, **kwargs)
+        return _http_get(request.url)
+
+    mp = pytest.MonkeyPatch()
+    mp.setattr(httpx.Client, "send", sync_send, raising=True)
+    mp.setattr(httpx.AsyncClient, "send", async_send, raising=True)
+    # The certificate check opens its own socket outside httpx; probes see no SSL info
+    mp.setattr(app_module, "_get_ssl_cert_info", _no_ssl_cert_info, raising=True)
+    yield
+    mp.undo()
+
+
+@pytest.fixture(autouse=True)
+def _real_ssl(request, _http_patch):
+    # Tests marked real_ssl get the real _get_ssl_cert_info back (they mock the sockets themselves)
+    if request.node.get_closest_marker("real_ssl"):
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(app_module, "_get_ssl_cert_info", _REAL_SSL_CERT_INFO)
+            yield
+    else:
+        yield
 
 
 @pytest.fixture()
-def mock_http_fail(monkeypatch):
-    import httpx
+def http_mode(_http_patch):
+    # Setter for the mocked HTTP behaviour of the current test; back to the OK default afterwards
+    def _set(get):
+        global _http_get
+        _http_get = get
 
-    def sync_get(self, url, *args, **kwargs):
-        return MockResp(404)
+    yield _set
+    _set(_respond_ok)
 
-    async def async_get(self, url, *args, **kwargs):
-        return MockResp(404)
 
-    monkeypatch.setattr(httpx.Client, "get", sync_get, raising=True)
-    monkeypatch.setattr(httpx.AsyncClient, "get", async_get, raising=True)
+@pytest.fixture()
+def mock_http_fail(http_mode):
+    http_mode(lambda url: _FAIL_RESP)
+    return True
+
+
+@pytest.fixture()
+def mock_http_error(http_mode):
+    def get(url):
+        raise RuntimeError("boom")
+
+    http_mode(get)
     return True
@@ -1,7 +1,9 @@
 
+import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
-from endpoint_pulse.app import _get_ssl_cert_info, _probe_url
+import endpoint_pulse.app as app_module
+from endpoint_pulse.app import _probe_url
 
 def test_healthz(client: TestClient):
     res = client.get("/healthz")
@@ -35,7 +37,7 @@ def test_create_rename_delete_folder(client: TestClient):
     assert res.json() == {"ok": True}
 
 
-def test_folder_nodes_crud_and_tests(client: TestClient, mock_http_ok):
+def test_folder_nodes_crud_and_tests(client: TestClient):
     # Create folder
     fid = client.post("/api/folders", json={"name": "Staging"}).json()["id"]
 
@@ -83,11 +85,12 @@ def test_not_found_errors(client: TestClient):
     assert client.post("/api/nodes/999/test").status_code == 404
     assert client.post("/api/folders/999/test").status_code == 404
 
+@pytest.mark.real_ssl
 @patch('ssl.create_default_context')
 @patch('socket.create_connection')
 def test_get_ssl_cert_info(mock_create_connection, mock_create_default_context):
     # Test with non-https url
-    info = _get_ssl_cert_info("http://example.com")
+    info = app_module._get_ssl_cert_info("http://example.com")
     assert info == {}
 
     # Test with https url
@@ -101,7 +104,7 @@ def test_get_ssl_cert_info(mock_create_connection, mock_create_default_context):
     mock_create_default_context.return_value = mock_context
     mock_create_connection.return_value.__enter__.return_value = mock_socket
 
-    info = _get_ssl_cert_info("https://example.com")
+    info = app_module._get_ssl_cert_info("https://example.com")
     assert info["ssl_valid"] is True
     assert info["ssl_days_left"] > 0
 
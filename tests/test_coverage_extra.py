@@ -1,57 +1,32 @@
 import io
 import urllib.parse
-from typing import List
 
-import pytest
+import httpx
 from fastapi.testclient import TestClient
 
 import endpoint_pulse.app as app_module
 
-
-@pytest.fixture()
-def mock_http_error(monkeypatch):
-    import httpx
-
-    def sync_get(self, url, *args, **kwargs):
-        raise RuntimeError("boom")
-
-    async def async_get(self, url, *args, **kwargs):
-        raise RuntimeError("boom")
-
-    monkeypatch.setattr(httpx.Client, "get", sync_get, raising=True)
-    monkeypatch.setattr(httpx.AsyncClient, "get", async_get, raising=True)
-    return True
+# Cookie headers shared by the preference/timeout clamping tests
+_H_WEIRD_NEG5 = {"cookie": "theme=weird; timeout=-5"}
+_H_DARK_5000 = {"cookie": "timeout=5000; theme=dark"}
+_H_TIMEOUT_5000 = {"cookie": "timeout=5000"}
+_H_TIMEOUT_NEG10 = {"cookie": "timeout=-10"}
 
 
 def test_index_cookie_parsing_and_clamping(client: TestClient):
     # Invalid theme -> defaults to light; timeout clamped to range [1,120]
-    res = client.get("/", headers={"cookie": "theme=weird; timeout=-5"})
+    res = client.get("/", headers=_H_WEIRD_NEG5)
     assert res.status_code == 200
-    res = client.get("/", headers={"cookie": "timeout=5000; theme=dark"})
+    res = client.get("/", headers=_H_DARK_5000)
     assert res.status_code == 200
 
 
-def test_form_add_folder_empty_name_redirect(client: TestClient):
-    res = client.post("/folders/add", data={"name": "   "}, allow_redirects=False)
-    assert res.status_code == 303
-
-
-def test_form_rename_delete_folder_edge_cases(client: TestClient):
-    # 404 on rename/delete of missing folder
-    assert client.post("/folders/999/rename", data={"name": "X"}, allow_redirects=False).status_code == 404
-    assert client.post("/folders/999/delete", allow_redirects=False).status_code == 404
-
-    # Create and then attempt empty rename -> redirect back
-    fid = client.post("/api/folders", json={"name": "F"}).json()["id"]
-    res = client.post(f"/folders/{fid}/rename", data={"name": "  "}, allow_redirects=False)
-    assert res.status_code == 303
-
-
-def test_duplicate_folder_with_nodes_and_copy_names(client: TestClient):
+def test_duplicate_folder_with_nodes_and_copy_names(client: TestClient, make_folder):
     # Create folder and nodes
-    fid = client.post("/api/folders", json={"name": "Prod"}).json()["id"]
-    client.post(f"/api/folders/{fid}/nodes", json={"name": "Home", "url": "https://e.com", "comment": "", "active": True})
-    client.post(f"/api/folders/{fid}/nodes", json={"name": "copy_1_Home", "url": "https://e.com/x", "comment": "", "active": True})
+    fid, _ = make_folder("Prod", [
+        {"name": "Home"},
+        {"name": "copy_1_Home", "url": "https://e.com/x"},
+    ])
 
     # Duplicate folder (should create copy_1_Prod)
     res = client.post(f"/folders/{fid}/duplicate", allow_redirects=False)
@@ -88,9 +63,8 @@ def test_add_node_and_edit_invalid_and_success(client: TestClient):
     assert res.status_code == 303
 
 
-def test_delete_node_redirect_and_404(client: TestClient):
-    fid = client.post("/api/folders", json={"name": "B"}).json()["id"]
-    nid = client.post(f"/api/folders/{fid}/nodes", json={"name": "N", "url": "https://e.com", "comment": "", "active": True}).json()["id"]
+def test_delete_node_redirect_and_404(client: TestClient, make_folder):
+    fid, (nid,) = make_folder("B", [{"name": "N"}])
     # delete redirect back to folder
     res = client.post(f"/nodes/{nid}/delete", allow_redirects=False)
     assert res.status_code == 303
@@ -98,13 +72,9 @@ def test_delete_node_redirect_and_404(client: TestClient):
     assert client.post(f"/nodes/{nid}/delete", allow_redirects=False).status_code == 404
 
 
-def test_bulk_delete_fallback_when_no_ids(client: TestClient):
-    fid = client.post("/api/folders", json={"name": "C"}).json()["id"]
-    # add three nodes
-    for i in range(3):
-        client.post(f"/api/folders/{fid}/nodes", json={"name": f"N{i}", "url": "https://e.com", "comment": "", "active": True})
-    tree = client.get("/api/tree").json()
-    node_ids: List[int] = [n["id"] for n in tree["folders"][0]["nodes"]]
+def test_bulk_delete_fallback_when_no_ids(client: TestClient, make_folder):
+    # folder with three nodes
+    fid, node_ids = make_folder("C", [{"name": f"N{i}"} for i in range(3)])
     # Post without node_ids -> should delete first 2 by fallback
     res = client.post("/nodes/bulk_delete", data={"folder_id": str(fid)}, allow_redirects=False)
     assert res.status_code == 303
@@ -112,9 +82,8 @@ def test_bulk_delete_fallback_when_no_ids(client: TestClient):
     assert remaining == node_ids[2:]
 
 
-def test_duplicate_node_and_keep_context(client: TestClient):
-    fid = client.post("/api/folders", json={"name": "D"}).json()["id"]
-    nid = client.post(f"/api/folders/{fid}/nodes", json={"name": "X", "url": "https://e.com", "comment": "", "active": True}).json()["id"]
+def test_duplicate_node_and_keep_context(client: TestClient, make_folder):
+    fid, (nid,) = make_folder("D", [{"name": "X"}])
     # duplicate with keep folder context
     res = client.post(f"/nodes/{nid}/duplicate", data={"keep_folder_context": "1"}, allow_redirects=False)
     assert res.status_code == 303
@@ -122,9 +91,8 @@ def test_duplicate_node_and_keep_context(client: TestClient):
     assert client.post("/nodes/999/duplicate", allow_redirects=False).status_code == 404
 
 
-def test_toggle_active_referer_logic(client: TestClient):
-    fid = client.post("/api/folders", json={"name": "E"}).json()["id"]
-    nid = client.post(f"/api/folders/{fid}/nodes", json={"name": "Y", "url": "https://e.com", "comment": "", "active": True}).json()["id"]
+def test_toggle_active_referer_logic(client: TestClient, make_folder):
+    fid, (nid,) = make_folder("E", [{"name": "Y"}])
 
     # Referer with node_id query should keep node focus
     res = client.post(f"/nodes/{nid}/toggle_active", headers={"referer": f"http://testserver/?node_id={nid}"}, allow_redirects=False)
@@ -174,10 +142,9 @@ def test_build_chart_stats_edges():
     assert s3["x_step"] in (1, 10)
 
 
-def test_probe_exception_paths(client: TestClient, mock_http_error):
-    # Create data to exercise both sync and async probes via endpoints
-    fid = client.post("/api/folders", json={"name": "P"}).json()["id"]
-    nid = client.post(f"/api/folders/{fid}/nodes", json={"name": "URL", "url": "https://e.com", "comment": "", "active": True}).json()["id"]
+def test_probe_exception_paths(client: TestClient, make_folder, mock_http_error):
+    # Create data to exercise the probe error handling via the node and folder endpoints
+    fid, (nid,) = make_folder("P", [{"name": "URL"}])
     # Node test should handle exception and return ok False with error
     res = client.post(f"/api/nodes/{nid}/test")
     assert res.status_code == 200 and res.json().get("ok") is False and "error" in res.json()
@@ -187,23 +154,19 @@ def test_probe_exception_paths(client: TestClient, mock_http_error):
 
 
 
-def test_index_selection_by_query_params(client: TestClient):
+def test_index_selection_by_query_params(client: TestClient, make_folder):
     # Create folder and node, then load index with selections
-    fid = client.post("/api/folders", json={"name": "Sel"}).json()["id"]
-    nid = client.post(f"/api/folders/{fid}/nodes", json={"name": "Pick", "url": "https://e.com", "comment": "", "active": True}).json()["id"]
+    fid, (nid,) = make_folder("Sel", [{"name": "Pick"}])
     r1 = client.get(f"/?folder_id={fid}")
     assert r1.status_code == 200
     r2 = client.get(f"/?node_id={nid}")
     assert r2.status_code == 200
 
 
-def test_bulk_delete_global_fallback_without_folder(client: TestClient):
+def test_bulk_delete_global_fallback_without_folder(client: TestClient, make_folder):
     # Create two folders and three nodes overall
-    f1 = client.post("/api/folders", json={"name": "G1"}).json()["id"]
-    f2 = client.post("/api/folders", json={"name": "G2"}).json()["id"]
-    client.post(f"/api/folders/{f1}/nodes", json={"name": "A", "url": "https://e.com/a", "comment": "", "active": True})
-    client.post(f"/api/folders/{f1}/nodes", json={"name": "B", "url": "https://e.com/b", "comment": "", "active": True})
-    client.post(f"/api/folders/{f2}/nodes", json={"name": "C", "url": "https://e.com/c", "comment": "", "active": True})
+    make_folder("G1", [{"name": "A", "url": "https://e.com/a"}, {"name": "B", "url": "https://e.com/b"}])
+    make_folder("G2", [{"name": "C", "url": "https://e.com/c"}])
     # Post with no folder_id and no node_ids -> delete first 2 globally
     res = client.post("/nodes/bulk_delete", data={}, allow_redirects=False)
     assert res.status_code == 303
@@ -213,10 +176,6 @@ def test_bulk_delete_global_fallback_without_folder(client: TestClient):
     assert total_nodes == 1
 
 
-def test_duplicate_folder_404(client: TestClient):
-    assert client.post("/folders/9999/duplicate", allow_redirects=False).status_code == 404
-
-
 def test_duplicate_node_orphan_folder_404(client: TestClient):
     # Create consistent data
     data = app_module._load_data()
@@ -251,19 +210,17 @@ def test_duplicate_node_orphan_folder_404(client: TestClient):
     assert client.post(f"/nodes/{orphan_nid}/duplicate", allow_redirects=False).status_code == 404
 
 
-def test_form_test_node_html_timeout_clamp_and_ok_errors_zero(client: TestClient, mock_http_ok):
-    fid = client.post("/api/folders", json={"name": "TN"}).json()["id"]
-    nid = client.post(f"/api/folders/{fid}/nodes", json={"name": "U", "url": "https://ex.com", "comment": "", "active": True}).json()["id"]
-    res = client.post(f"/nodes/{nid}/test/html", data={}, headers={"cookie": "timeout=5000"})
+def test_form_test_node_html_timeout_clamp_and_ok_errors_zero(client: TestClient, make_folder):
+    fid, (nid,) = make_folder("TN", [{"name": "U", "url": "https://ex.com"}])
+    res = client.post(f"/nodes/{nid}/test/html", data={}, headers=_H_TIMEOUT_5000)
     assert res.status_code == 200
 
 
-def test_form_test_folder_html_runs_clamp_and_inactive_only(client: TestClient, mock_http_ok):
-    fid = client.post("/api/folders", json={"name": "TF"}).json()["id"]
-    # Add one inactive node to force skipped path
-    client.post(f"/api/folders/{fid}/nodes", json={"name": "U", "url": "https://ex.com", "comment": "", "active": False})
+def test_form_test_folder_html_runs_clamp_and_inactive_only(client: TestClient, make_folder):
+    # One inactive node only, to force the skipped path
+    fid, _ = make_folder("TF", [{"name": "U", "url": "https://ex.com", "active": False}])
     # runs negative -> clamp to 1
-    res = client.post(f"/folders/{fid}/test/html", data={"runs": "-5"}, headers={"cookie": "timeout=-10"})
+    res = client.post(f"/folders/{fid}/test/html", data={"runs": "-5"}, headers=_H_TIMEOUT_NEG10)
     assert res.status_code == 200
     # runs too big -> clamp to 100
     res = client.post(f"/folders/{fid}/test/html", data={"runs": "500"})
@@ -280,7 +237,7 @@ def test_next_copy_name_variants():
     assert name2 == "copy_3_X"
 
 
-def test_chart_stats_more_colors_and_steps():
+def test_chart_stats_more_colors_and_steps(uniform_rows):
     # Include a skipped/untested row to exercise gray color path
     rows = [
         {"ok": True, "elapsed_ms": 5},
@@ -289,9 +246,179 @@ def test_chart_stats_more_colors_and_steps():
     s = app_module._build_chart_stats(rows)
     assert s["count_total"] == 2
     # Exercise larger x_step thresholds (25, 50, 100)
-    s25 = app_module._build_chart_stats([{"ok": True, "elapsed_ms": 1} for _ in range(120)])
+    s25 = app_module._build_chart_stats(uniform_rows[120])
     assert s25["x_step"] in (10, 25, 50, 100)
-    s50 = app_module._build_chart_stats([{"ok": True, "elapsed_ms": 1} for _ in range(300)])
+    s50 = app_module._build_chart_stats(uniform_rows[300])
     assert s50["x_step"] in (25, 50, 100)
-    s100 = app_module._build_chart_stats([{"ok": True, "elapsed_ms": 1} for _ in range(600)])
+    s100 = app_module._build_chart_stats(uniform_rows[600])
     assert s100["x_step"] in (50, 100)
+
+
+def test_aggregate_measurements_single_pass():
+    measurements = [
+        {"id": 1, "ok": True, "elapsed_ms": 10},
+        {"id": 1, "ok": False, "elapsed_ms": 30},
+        {"id": 1, "ok": False, "error": "boom"},
+        {"id": 2, "ok": False, "error": "boom"},
+        {"id": None, "ok": False, "elapsed_ms": 5},
+    ]
+    stats = app_module._aggregate_measurements(measurements)
+    assert stats[1] == {"errors": 2, "avg_ms": 20, "min_ms": 10, "max_ms": 30}
+    # No timings recorded -> only the error count is reported
+    assert stats[2] == {"errors": 1}
+    assert set(stats) == {1, 2}
+
+
+def test_result_row_keys_only_when_known():
+    node = {"id": 3, "name": "N", "url": "https://e.com", "active": True}
+    row = app_module._result_row(node, {"ok": True, "status_code": 200, "fetch": "x"}, stats={"errors": 0})
+    assert row == {"id": 3, "name": "N", "url": "https://e.com", "active": True,
+                   "ok": True, "status_code": 200, "fetch": "parallel", "errors": 0}
+    # Inactive nodes are skipped and carry no probe keys
+    skipped = app_module._result_row({**node, "active": False}, {"ok": True})
+    assert skipped["tested"] is False and skipped["fetch"] == "skipped"
+    assert "ok" not in skipped and "avg_ms" not in skipped
+
+
+def test_selection_target_from_query():
+    assert app_module._selection_target("node_id=4&folder_id=2") == "/?node_id=4"
+    assert app_module._selection_target("folder_id=2&node_id=4") == "/?node_id=4"
+    assert app_module._selection_target("x=1&folder_id=2") == "/?folder_id=2"
+    assert app_module._selection_target("node_id=abc&folder_id=2") == "/?folder_id=2"
+    assert app_module._selection_target("other_node_id=4") is None
+    assert app_module._selection_target("") is None
+
+
+def test_shared_http_client_from_lifespan(app, tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_FILE", str(tmp_path / "lifespan.sqlite3"))
+    # A second lifespan replaces and then clears app.state.http; hand the session client's back afterwards
+    monkeypatch.setattr(app.state, "http", app.state.http)
+    with TestClient(app) as c:
+        shared = app.state.http
+        assert shared is not None and not shared.is_closed
+        fid = c.post("/api/folders", json={"name": "L"}).json()["id"]
+        c.post(f"/api/folders/{fid}/nodes", json={"name": "U", "url": "https://e.com", "comment": "", "active": True})
+        res = c.post(f"/folders/{fid}/test/html", data={"runs": "2"})
+        assert res.status_code == 200
+    assert shared.is_closed
+    assert app.state.http is None
+
+
+def test_bulk_delete_multipart_and_comma_separated_ids(client: TestClient, make_folder):
+    fid, ids = make_folder("M", [{"name": f"N{i}"} for i in range(4)])
+    # urlencoded with several ids in one value
+    res = client.post("/nodes/bulk_delete", data={"node_ids": f"{ids[0]},{ids[1]}", "folder_id": str(fid)}, allow_redirects=False)
+    assert res.status_code == 303 and res.headers["location"] == f"/?folder_id={fid}"
+    # multipart falls back to Starlette's form parser
+    res = client.post("/nodes/bulk_delete", files={"node_ids": (None, str(ids[2]))}, allow_redirects=False)
+    assert res.status_code == 303
+    remaining = [n["id"] for n in client.get("/api/tree").json()["folders"][0]["nodes"]]
+    assert remaining == [ids[3]]
+
+
+def test_form_test_selected_html_aggregates_runs(client: TestClient, make_folder):
+    fid, (nid,) = make_folder("S", [{"name": "U"}])
+    res = client.post(f"/folders/{fid}/test_selected/html", data={"node_ids": str(nid), "runs": "3"})
+    assert res.status_code == 200
+    # All three rounds feed the chart, and the row carries stats and the error count
+    assert b"Requests: 3/3" in res.content
+    assert b'data-errors="0"' in res.content
+    assert b'data-avg=""' not in res.content
+
+
+def test_save_data_skips_unchanged_content(client: TestClient, monkeypatch, tmp_path):
+    fid = client.post("/api/folders", json={"name": "H"}).json()["id"]
+    data = app_module._load_data()
+
+    calls = []
+    real_get_conn = app_module._get_conn
+    monkeypatch.setattr(app_module, "_get_conn", lambda: calls.append(1) or real_get_conn())
+    # Identical content -> no database access at all
+    app_module._save_data(data)
+    assert calls == []
+    # Changed content is written
+    data["folders"][0]["name"] = "H2"
+    app_module._save_data(data)
+    assert calls and app_module._load_data()["folders"][0]["name"] == "H2"
+
+    # The same content is still written to a different database file
+    monkeypatch.setenv("DB_FILE", str(tmp_path / "other.sqlite3"))
+    app_module._save_data(data)
+    assert app_module._load_data()["folders"][0]["id"] == fid
+
+
+def test_node_handlers_use_async_probe(client: TestClient, make_folder, monkeypatch):
+    def blocking_probe(*args, **kwargs):
+        raise AssertionError("blocking _probe_url must not be used by the node test handlers")
+
+    monkeypatch.setattr(app_module, "_probe_url", blocking_probe)
+    fid, (nid,) = make_folder("AN", [{"name": "U"}])
+    res = client.post(f"/nodes/{nid}/test/html")
+    assert res.status_code == 200
+    assert b'data-fetch="single"' in res.content and b'data-errors="0"' in res.content
+    res = client.post(f"/api/nodes/{nid}/test")
+    assert res.status_code == 200 and res.json()["ok"] is True and res.json()["id"] == nid
+
+
+def test_form_test_folder_html_is_streamed(client: TestClient, make_folder):
+    fid, _ = make_folder("ST", [{"name": "U"}])
+    res = client.post(f"/folders/{fid}/test/html")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/html")
+    assert "content-length" not in res.headers
+    assert b"Test Results" in res.content and res.content.rstrip().endswith(b"</html>")
+
+
+def test_batched_joins_small_pieces():
+    chunks = list(app_module._batched(["ab"] * 10, size=5))
+    assert chunks == ["ababab"] * 3 + ["ab"]
+    assert list(app_module._batched([])) == []
+
+
+def test_is_http_url():
+    assert app_module._is_http_url("https://e.com")
+    assert app_module._is_http_url("HTTP://e.com/path?q=1")
+    assert not app_module._is_http_url("ftp://e.com")
+    assert not app_module._is_http_url("https://")
+    assert not app_module._is_http_url("e.com")
+    assert not app_module._is_http_url("http://[::1")
+    assert not app_module._is_http_url("http://:80")
+    assert not app_module._is_http_url("https://@")
+    assert not app_module._is_http_url("https://exa mple.com")
+    assert not app_module._is_http_url("http://e.com:99999")
+    assert app_module._is_http_url("http://e.com:8080/")
+
+
+def test_form_add_node_rejects_overlong_name(client: TestClient):
+    fid = client.post("/api/folders", json={"name": "Long"}).json()["id"]
+    res = client.post("/nodes/add", data={"folder_id": str(fid), "name": "x" * 201, "url": "https://e.com"}, allow_redirects=False)
+    assert res.status_code == 303
+    assert client.get("/api/tree").json()["folders"][0]["nodes"] == []
+
+
+def test_probe_client_without_lifespan(client: TestClient, make_folder, monkeypatch):
+    # Without the lifespan's pooled client, probes use a short-lived AsyncClient
+    monkeypatch.setattr(app_module.app.state, "http", None)
+    fid, _ = make_folder("NL", [{"name": "U"}])
+    res = client.post(f"/api/folders/{fid}/test")
+    assert res.status_code == 200 and res.json()["results"][0]["ok"] is True
+
+
+async def test_probe_client_does_not_keep_cookies():
+    # A Set-Cookie seen by one probe must not be sent with the next one on the pooled client
+    async with app_module._new_probe_client() as client:
+        first = client.build_request("GET", "https://e.com/")
+        client.cookies.extract_cookies(httpx.Response(200, headers={"set-cookie": "sess=abc; Path=/"}, request=first))
+        assert "cookie" not in client.build_request("GET", "https://e.com/").headers
+
+
+def test_probes_do_not_open_sockets(client: TestClient, make_folder, monkeypatch):
+    # The session-wide stub keeps the SSL certificate check off the network
+    def no_socket(*args, **kwargs):
+        raise AssertionError("probe opened a real socket")
+
+    monkeypatch.setattr("socket.create_connection", no_socket)
+    fid, _ = make_folder("SSL", [{"name": "U", "url": "https://e.com"}])
+    res = client.post(f"/api/folders/{fid}/test")
+    assert res.status_code == 200
+    assert all("ssl_valid" not in r for r in res.json()["results"])
@@ -1,81 +1,72 @@
-import unittest
-from unittest.mock import patch, MagicMock
-from endpoint_pulse import endpoint_pulse_runner
 import sys
+from unittest.mock import MagicMock
 
-class TestEndpointPulseRunner(unittest.TestCase):
-    @patch('uvicorn.run')
-    @patch('argparse.ArgumentParser')
-    def test_main_default_args(self, mock_argparse, mock_uvicorn_run):
-        """Test that main() calls uvicorn.run with default arguments."""
-        # Mock argparse
-        mock_args = MagicMock()
-        mock_args.host = '127.0.0.1'
-        mock_args.port = 8000
-        mock_args.reload = False
-        mock_parser = MagicMock()
-        mock_parser.parse_args.return_value = mock_args
-        mock_argparse.return_value = mock_parser
-
-        # Call the main function
-        endpoint_pulse_runner.main()
+import pytest
 
-        # Assert that uvicorn.run was called with the correct arguments
-        mock_uvicorn_run.assert_called_once_with(
-            "endpoint_pulse.app:app",
-            host='127.0.0.1',
-            port=8000,
-            reload=False
-        )
-
-    @patch('uvicorn.run')
-    @patch('argparse.ArgumentParser')
-    @patch.dict('os.environ', {'ENDPOINT_PULSE_RELOAD': 'true'})
-    def test_main_reload_from_env(self, mock_argparse, mock_uvicorn_run):
-        """Test that main() enables reload from environment variable."""
-        # Mock argparse
-        mock_args = MagicMock()
-        mock_args.host = '127.0.0.1'
-        mock_args.port = 8000
-        mock_args.reload = False
-        mock_parser = MagicMock()
-        mock_parser.parse_args.return_value = mock_args
-        mock_argparse.return_value = mock_parser
-
-        # Call the main function
-        endpoint_pulse_runner.main()
+from endpoint_pulse import endpoint_pulse_runner
+
+# The runner never touches the database
+pytestmark = pytest.mark.no_db
+
+
+@pytest.fixture
+def _clean_env(monkeypatch):
+    # Make the runner's environment overrides independent of the calling shell
+    for name in ("ENDPOINT_PULSE_HOST", "ENDPOINT_PULSE_PORT", "ENDPOINT_PULSE_RELOAD"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def mock_run(monkeypatch):
+    mock = MagicMock()
+    monkeypatch.setattr("uvicorn.run", mock)
+    return mock
+
+
+def test_main_default_args(_clean_env, mock_run, monkeypatch):
+    """Test that main() calls uvicorn.run with default arguments."""
+    monkeypatch.setattr(sys, "argv", ["endpoint-pulse"])
+
+    endpoint_pulse_runner.main()
+
+    mock_run.assert_called_once_with("endpoint_pulse.app:app", host="127.0.0.1", port=8000, reload=False)
 
-        # Assert that uvicorn.run was called with reload=True
-        mock_uvicorn_run.assert_called_once_with(
-            "endpoint_pulse.app:app",
-            host='127.0.0.1',
-            port=8000,
-            reload=True
-        )
-
-    @patch('uvicorn.run')
-    @patch('argparse.ArgumentParser')
-    def test_main_reload_from_cli(self, mock_argparse, mock_uvicorn_run):
-        """Test that main() enables reload from the command line."""
-        # Mock argparse
-        mock_args = MagicMock()
-        mock_args.host = '127.0.0.1'
-        mock_args.port = 8000
-        mock_args.reload = True
-        mock_parser = MagicMock()
-        mock_parser.parse_args.return_value = mock_args
-        mock_argparse.return_value = mock_parser
-
-        # Call the main function
+
+def test_main_reload_from_env(_clean_env, mock_run, monkeypatch):
+    """Test that main() enables reload from environment variable."""
+    monkeypatch.setattr(sys, "argv", ["endpoint-pulse", "--host", "127.0.0.1", "--port", "8000"])
+    monkeypatch.setenv("ENDPOINT_PULSE_RELOAD", "true")
+
+    endpoint_pulse_runner.main()
+
+    mock_run.assert_called_once_with("endpoint_pulse.app:app", host="127.0.0.1", port=8000, reload=True)
+
+
+def test_main_reload_from_cli(_clean_env, mock_run, monkeypatch):
+    """Test that main() enables reload from the command line."""
+    monkeypatch.setattr(sys, "argv", ["endpoint-pulse", "--host", "127.0.0.1", "--port", "8000", "--reload"])
+
+    endpoint_pulse_runner.main()
+
+    mock_run.assert_called_once_with("endpoint_pulse.app:app", host="127.0.0.1", port=8000, reload=True)
+
+
+def test_main_help_does_not_import_uvicorn(_clean_env, monkeypatch):
+    """Test that --help exits before uvicorn is imported."""
+    monkeypatch.setattr(sys, "argv", ["endpoint-pulse", "--help"])
+    monkeypatch.delitem(sys.modules, "uvicorn", raising=False)
+
+    with pytest.raises(SystemExit):
         endpoint_pulse_runner.main()
 
-        # Assert that uvicorn.run was called with reload=True
-        mock_uvicorn_run.assert_called_once_with(
-            "endpoint_pulse.app:app",
-            host='127.0.0.1',
-            port=8000,
-            reload=True
-        )
+    assert "uvicorn" not in sys.modules
+
+
+def test_main_reload_from_env_strips_whitespace(_clean_env, mock_run, monkeypatch):
+    """Test that the reload environment value is matched case- and whitespace-insensitively."""
+    monkeypatch.setattr(sys, "argv", ["endpoint-pulse"])
+    monkeypatch.setenv("ENDPOINT_PULSE_RELOAD", " Yes ")
+
+    endpoint_pulse_runner.main()
 
-if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    mock_run.assert_called_once_with("endpoint_pulse.app:app", host="127.0.0.1", port=8000, reload=True)
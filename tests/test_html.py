@@ -1,65 +1,81 @@
 
 from fastapi.testclient import TestClient
 from endpoint_pulse.app import _next_copy_name, _build_chart_stats, _resolve_db_file
+import asyncio
 import os
 from pathlib import Path
 from unittest.mock import patch
 
+import pytest
+
 def test_index(client: TestClient):
     res = client.get("/")
     assert res.status_code == 200
     assert b"Endpoint Pulse" in res.content
 
 
-def test_form_folder_and_nodes_and_bulk_delete(client: TestClient):
-    # Add folder via form
+def test_form_add_folder(client: TestClient):
+    # The redirect carries the new folder id
     res = client.post("/folders/add", data={"name": "Prod"}, allow_redirects=False)
     assert res.status_code == 303
-    # Extract folder id by reading API tree
-    fid = client.get("/api/tree").json()["folders"][0]["id"]
+    fid = int(res.headers["location"].rsplit("folder_id=", 1)[1])
+    assert client.get("/api/tree").json()["folders"] == [{"id": fid, "name": "Prod", "nodes": []}]
 
-    # Rename via form
-    res = client.post(f"/folders/{fid}/rename", data={"name": "Production"}, allow_redirects=False)
-    assert res.status_code == 303
 
-    # Add nodes via form
-    for i in range(3):
-        res = client.post("/nodes/add", data={
+async def test_form_add_nodes(async_client, make_folder):
+    fid, _ = make_folder("Prod")
+    # Add nodes via form, concurrently
+    responses = await asyncio.gather(*(
+        async_client.post("/nodes/add", data={
             "folder_id": str(fid),
             "name": f"N{i}",
             "url": "https://example.com",
             "comment": "",
             "active": "on",
-        }, allow_redirects=False)
-        assert res.status_code == 303
+        })
+        for i in range(3)
+    ))
+    assert [r.status_code for r in responses] == [303, 303, 303]
+    nodes = (await async_client.get("/api/tree")).json()["folders"][0]["nodes"]
+    assert sorted(n["name"] for n in nodes) == ["N0", "N1", "N2"]
+    assert all(n["active"] for n in nodes)
+
+
+def test_form_rename_folder(client: TestClient, prod_folder_with_nodes):
+    fid, _ = prod_folder_with_nodes
+    res = client.post(f"/folders/{fid}/rename", data={"name": "Production"}, allow_redirects=False)
+    assert res.status_code == 303
+    assert client.get("/api/tree").json()["folders"][0]["name"] == "Production"
 
-    # Toggle first node to inactive
-    nid0 = client.get("/api/tree").json()["folders"][0]["nodes"][0]["id"]
+
+def test_form_toggle_node_inactive(client: TestClient, prod_folder_with_nodes):
+    _, (nid0, _, _) = prod_folder_with_nodes
     res = client.post(f"/nodes/{nid0}/toggle_active", allow_redirects=False)
     assert res.status_code == 303
+    assert client.get("/api/tree").json()["folders"][0]["nodes"][0]["active"] is False
+
 
-    # Duplicate second node
-    nid1 = client.get("/api/tree").json()["folders"][0]["nodes"][1]["id"]
+def test_form_duplicate_node(client: TestClient, prod_folder_with_nodes):
+    _, (_, nid1, _) = prod_folder_with_nodes
     res = client.post(f"/nodes/{nid1}/duplicate", allow_redirects=False)
     assert res.status_code == 303
+    assert len(client.get("/api/tree").json()["folders"][0]["nodes"]) == 4
 
-    # Bulk delete: select two node ids
-    tree = client.get("/api/tree").json()
-    ids = [n["id"] for n in tree["folders"][0]["nodes"]][:2]
+
+def test_form_bulk_delete_by_ids(client: TestClient, prod_folder_with_nodes):
+    fid, ids = prod_folder_with_nodes
     res = client.post("/nodes/bulk_delete", data=[
         ("node_ids", str(ids[0])),
         ("node_ids", str(ids[1])),
         ("folder_id", str(fid)),
     ], allow_redirects=False)
     assert res.status_code == 303
+    remaining_ids = [n["id"] for n in client.get("/api/tree").json()["folders"][0]["nodes"]]
+    assert remaining_ids == ids[2:]
 
-    # Ensure deletions applied
-    remaining = client.get("/api/tree").json()["folders"][0]["nodes"]
-    remaining_ids = [n["id"] for n in remaining]
-    for rid in ids:
-        assert rid not in remaining_ids
 
-    # Delete all in folder
+def test_form_bulk_delete_all_in_folder(client: TestClient, prod_folder_with_nodes):
+    fid, _ = prod_folder_with_nodes
     res = client.post("/nodes/bulk_delete", data={
         "folder_id": str(fid),
         "delete_all_in_folder": "1",
@@ -67,7 +83,9 @@ def test_form_folder_and_nodes_and_bulk_delete(client: TestClient):
     assert res.status_code == 303
     assert client.get("/api/tree").json()["folders"][0]["nodes"] == []
 
-    # Delete folder
+
+def test_form_delete_folder(client: TestClient, prod_folder_with_nodes):
+    fid, _ = prod_folder_with_nodes
     res = client.post(f"/folders/{fid}/delete", allow_redirects=False)
     assert res.status_code == 303
     assert client.get("/api/tree").json() == {"folders": []}
@@ -80,7 +98,7 @@ def test_form_preferences(client: TestClient):
     assert "timeout=20" in res.headers["set-cookie"]
 
 
-def test_form_tests(client: TestClient, mock_http_ok):
+def test_form_tests(client: TestClient):
     # Add folder and node
     fid = client.post("/api/folders", json={"name": "Test"}).json()["id"]
     nid = client.post(f"/api/folders/{fid}/nodes", json={"name": "N", "url": "https://e.com"}).json()["id"]
@@ -100,15 +118,14 @@ def test_form_tests(client: TestClient, mock_http_ok):
     assert res.status_code == 200
     assert b"Test Results" in res.content
 
-def test_form_folder_errors(client: TestClient):
+def test_form_folder_errors(client: TestClient, make_folder):
     # Add folder with empty name
     res = client.post("/folders/add", data={"name": " "}, allow_redirects=False)
     assert res.status_code == 303
     assert res.headers["location"] == "/"
 
     # Add a folder to test rename and delete errors
-    res = client.post("/folders/add", data={"name": "test"}, allow_redirects=False)
-    fid = client.get("/api/tree").json()["folders"][0]["id"]
+    fid, _ = make_folder("test")
 
     # Rename folder with empty name
     res = client.post(f"/folders/{fid}/rename", data={"name": " "}, allow_redirects=False)
@@ -123,10 +140,9 @@ def test_form_folder_errors(client: TestClient):
     res = client.post("/folders/999/delete", allow_redirects=False)
     assert res.status_code == 404
 
-def test_form_node_errors(client: TestClient):
+def test_form_node_errors(client: TestClient, make_folder):
     # Add a folder to test node errors
-    res = client.post("/folders/add", data={"name": "test"}, allow_redirects=False)
-    fid = client.get("/api/tree").json()["folders"][0]["id"]
+    fid, _ = make_folder("test")
 
     # Add node with empty name
     res = client.post("/nodes/add", data={"folder_id": fid, "name": " ", "url": "https://example.com"}, allow_redirects=False)
@@ -143,8 +159,7 @@ def test_form_node_errors(client: TestClient):
     assert res.status_code == 404
 
     # Add a node to test edit and delete errors
-    res = client.post("/nodes/add", data={"folder_id": fid, "name": "test", "url": "https://example.com"}, allow_redirects=False)
-    nid = client.get("/api/tree").json()["folders"][0]["nodes"][0]["id"]
+    nid = client.post(f"/api/folders/{fid}/nodes", json={"name": "test", "url": "https://example.com"}).json()["id"]
 
     # Edit node with empty name
     res = client.post(f"/nodes/{nid}/edit", data={"name": " ", "url": "https://example.com"}, allow_redirects=False)
@@ -164,12 +179,9 @@ def test_form_node_errors(client: TestClient):
     res = client.post("/nodes/999/delete", allow_redirects=False)
     assert res.status_code == 404
 
-def test_form_bulk_delete_no_ids(client: TestClient):
+def test_form_bulk_delete_no_ids(client: TestClient, make_folder):
     # Add a folder and some nodes
-    res = client.post("/folders/add", data={"name": "test"}, allow_redirects=False)
-    fid = client.get("/api/tree").json()["folders"][0]["id"]
-    for i in range(3):
-        client.post("/nodes/add", data={"folder_id": fid, "name": f"N{i}", "url": "https://example.com"}, allow_redirects=False)
+    fid, _ = make_folder("test", [{"name": f"N{i}"} for i in range(3)])
 
     # Bulk delete with no node_ids (folder-scoped fallback)
     res = client.post("/nodes/bulk_delete", data={"folder_id": fid}, allow_redirects=False)
@@ -181,11 +193,9 @@ def test_form_bulk_delete_no_ids(client: TestClient):
     assert res.status_code == 303
     assert len(client.get("/api/tree").json()["folders"][0]["nodes"]) == 0
 
-def test_form_duplicate_folder(client: TestClient):
+def test_form_duplicate_folder(client: TestClient, make_folder):
     # Add a folder and a node
-    res = client.post("/folders/add", data={"name": "test"}, allow_redirects=False)
-    fid = client.get("/api/tree").json()["folders"][0]["id"]
-    client.post("/nodes/add", data={"folder_id": fid, "name": "N1", "url": "https://example.com"}, allow_redirects=False)
+    fid, _ = make_folder("test", [{"name": "N1"}])
 
     # Duplicate the folder
     res = client.post(f"/folders/{fid}/duplicate", allow_redirects=False)
@@ -202,12 +212,9 @@ def test_form_duplicate_folder(client: TestClient):
     res = client.post("/folders/999/duplicate", allow_redirects=False)
     assert res.status_code == 404
 
-def test_form_toggle_node_active(client: TestClient):
+def test_form_toggle_node_active(client: TestClient, make_folder):
     # Add a folder and a node
-    res = client.post("/folders/add", data={"name": "test"}, allow_redirects=False)
-    fid = client.get("/api/tree").json()["folders"][0]["id"]
-    res = client.post("/nodes/add", data={"folder_id": fid, "name": "N1", "url": "https://example.com"}, allow_redirects=False)
-    nid = client.get("/api/tree").json()["folders"][0]["nodes"][0]["id"]
+    fid, (nid,) = make_folder("test", [{"name": "N1"}])
 
     # Toggle active with no referer
     res = client.post(f"/nodes/{nid}/toggle_active", allow_redirects=False)
@@ -245,68 +252,77 @@ def test_set_preferences_referer(client: TestClient):
     assert res.status_code == 303
     assert res.headers["location"] == "/?folder_id=1"
 
-def test_form_test_selected_no_nodes(client: TestClient):
+def test_form_test_selected_no_nodes(client: TestClient, make_folder):
     # Add a folder
-    res = client.post("/folders/add", data={"name": "test"}, allow_redirects=False)
-    fid = client.get("/api/tree").json()["folders"][0]["id"]
+    fid, _ = make_folder("test")
 
     # Test selected with no nodes selected
     res = client.post(f"/folders/{fid}/test_selected/html", data={}, allow_redirects=False)
     assert res.status_code == 303
     assert res.headers["location"] == f"/?folder_id={fid}"
 
-def test_form_duplicate_node_error(client: TestClient):
+def test_form_duplicate_node_error(client: TestClient, make_folder):
     # Duplicate non-existent node
     res = client.post("/nodes/999/duplicate", allow_redirects=False)
     assert res.status_code == 404
 
     # Add a folder and a node, then delete the folder
-    res = client.post("/folders/add", data={"name": "test"}, allow_redirects=False)
-    fid = client.get("/api/tree").json()["folders"][0]["id"]
-    res = client.post("/nodes/add", data={"folder_id": fid, "name": "N1", "url": "https://example.com"}, allow_redirects=False)
-    nid = client.get("/api/tree").json()["folders"][0]["nodes"][0]["id"]
+    fid, (nid,) = make_folder("test", [{"name": "N1"}])
     client.post(f"/folders/{fid}/delete", allow_redirects=False)
 
     # Duplicate node whose folder is gone
     res = client.post(f"/nodes/{nid}/duplicate", allow_redirects=False)
     assert res.status_code == 404
 
-def test_next_copy_name():
-    assert _next_copy_name([], "base") == "copy_1_base"
-    assert _next_copy_name(["copy_1_base"], "base") == "copy_2_base"
-    assert _next_copy_name(["copy_2_base"], "base") == "copy_3_base"
-    assert _next_copy_name(["copy_1_base", "copy_3_base"], "base") == "copy_4_base"
-    assert _next_copy_name(["copy_1_base", "copy_2_base"], "base") == "copy_3_base"
-    assert _next_copy_name(["copy_1_base"], "copy_1_base") == "copy_2_base"
-    assert _next_copy_name(["copy_2_base"], "copy_1_base") == "copy_3_base"
-    assert _next_copy_name(["copy_1_base", "copy_3_base"], "copy_1_base") == "copy_4_base"
-
-def test_build_chart_stats():
-    # Test with no results
-    stats = _build_chart_stats([])
-    assert stats["count_total"] == 0
-    assert stats["count_measured"] == 0
-    assert stats["avg_ms"] is None
-
-    # Test with some results
-    results = [
-        {"elapsed_ms": 100, "ok": True, "name": "N1"},
-        {"elapsed_ms": 200, "ok": False, "name": "N2"},
-        {"elapsed_ms": 300, "ok": True, "name": "N3"},
-        {"tested": False, "name": "N4"},
-    ]
+@pytest.mark.no_db
+@pytest.mark.parametrize("existing,original,expected", [
+    ([], "base", "copy_1_base"),
+    (["copy_1_base"], "base", "copy_2_base"),
+    (["copy_2_base"], "base", "copy_3_base"),
+    (["copy_1_base", "copy_3_base"], "base", "copy_4_base"),
+    (["copy_1_base", "copy_2_base"], "base", "copy_3_base"),
+    (["copy_1_base"], "copy_1_base", "copy_2_base"),
+    (["copy_2_base"], "copy_1_base", "copy_3_base"),
+    (["copy_1_base", "copy_3_base"], "copy_1_base", "copy_4_base"),
+])
+def test_next_copy_name(existing, original, expected):
+    assert _next_copy_name(existing, original) == expected
+
+@pytest.mark.no_db
+@pytest.mark.parametrize("results,expected", [
+    pytest.param([], {"count_total": 0, "count_measured": 0, "avg_ms": None}, id="empty"),
+    pytest.param(
+        [
+            {"elapsed_ms": 100, "ok": True, "name": "N1"},
+            {"elapsed_ms": 200, "ok": False, "name": "N2"},
+            {"elapsed_ms": 300, "ok": True, "name": "N3"},
+            {"tested": False, "name": "N4"},
+        ],
+        {"count_total": 4, "count_measured": 3, "avg_ms": 200, "max_ms": 300},
+        id="populated",
+    ),
+])
+def test_build_chart_stats(results, expected):
     stats = _build_chart_stats(results)
-    assert stats["count_total"] == 4
-    assert stats["count_measured"] == 3
-    assert stats["avg_ms"] == 200
-    assert stats["max_ms"] == 300
-    assert len(stats["series"]) == 4
+    assert {k: stats[k] for k in expected} == expected
+    assert len(stats["series"]) == len(results)
     assert len(stats["y_ticks"]) > 0
 
+@pytest.mark.no_db
+def test_build_chart_stats_large(benchmark):
+    # Benchmark: 10k rows through the chart helper; skipped by default, timed serially by make bench
+    results = [{"elapsed_ms": i % 500, "ok": True, "name": f"n{i}"} for i in range(10_000)]
+    stats = benchmark(_build_chart_stats, results)
+    assert stats["count_total"] == 10_000
+    assert stats["count_measured"] == 10_000
+    assert stats["avg_ms"] == 250
+
 @patch.dict(os.environ, {"DB_FILE": "/tmp/test.db"})
 def test_resolve_db_file_db_file():
     assert _resolve_db_file() == Path("/tmp/test.db")
 
 @patch.dict(os.environ, {"DATA_FILE": "/tmp/test.data"})
-def test_resolve_db_file_data_file():
+def test_resolve_db_file_data_file(monkeypatch):
+    # DB_FILE takes precedence and is set for the whole test session
+    monkeypatch.delenv("DB_FILE", raising=False)
     assert _resolve_db_file() == Path("/tmp/test.data").with_suffix(".sqlite3")
@@ -1,12 +1,10 @@
-import os
 import tempfile
-import subprocess
-import time
+import threading
 import socket
 from pathlib import Path
 
 import pytest
-import requests
+import uvicorn
 
 
 def find_free_port():
@@ -15,54 +13,46 @@ def find_free_port():
         return s.getsockname()[1]
 
 
+class _ReadyServer(uvicorn.Server):
+    """uvicorn.Server that signals a threading.Event as soon as startup has finished."""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.ready = threading.Event()
+
+    async def startup(self, sockets=None):
+        try:
+            await super().startup(sockets=sockets)
+        finally:
+            # Set on failure too, so the waiting fixture wakes up and checks `started`
+            self.ready.set()
+
+
 @pytest.fixture(scope="session")
 def e2e_server():
-    # Temporary data file for E2E, isolated
-    with tempfile.TemporaryDirectory() as tmpdir:
-        db_path = Path(tmpdir) / "e2e_data.sqlite3"
+    # Temporary data file for E2E, isolated; the app resolves DB_FILE per connection
+    with tempfile.TemporaryDirectory() as tmpdir, pytest.MonkeyPatch.context() as mp:
+        mp.setenv("DB_FILE", str(Path(tmpdir) / "e2e_data.sqlite3"))
         port = find_free_port()
-        env = os.environ.copy()
-        env["DB_FILE"] = str(db_path)
-        cmd = [
-            "python",
-            "-m",
-            "uvicorn",
-            "main:app",
-            "--host",
-            "127.0.0.1",
-            "--port",
-            str(port),
-        ]
-        proc = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-        # Wait for server
-        base = f"http://127.0.0.1:{port}"
-        for _ in range(100):
-            try:
-                r = requests.get(base + "/healthz", timeout=0.5)
-                if r.ok:
-                    break
-            except Exception:
-                pass
-            time.sleep(0.1)
-        else:
-            try:
-                proc.kill()
-            finally:
-                pass
+        # In-process uvicorn in a background thread: no interpreter start-up, no HTTP polling
+        config = uvicorn.Config("endpoint_pulse.app:app", host="127.0.0.1", port=port, log_level="warning")
+        server = _ReadyServer(config)
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+
+        # Wake up exactly when startup (socket bound, lifespan run) is done or has failed
+        if not server.ready.wait(timeout=10) or not server.started:
+            server.should_exit = True
             raise RuntimeError("Server failed to start for E2E")
 
-        yield base
-
-        proc.terminate()
-        try:
-            proc.wait(timeout=3)
-        except subprocess.TimeoutExpired:
-            proc.kill()
+        yield f"http://127.0.0.1:{port}"
 
+        server.should_exit = True
+        thread.join(timeout=3)
 
 
 @pytest.mark.playwright
+@pytest.mark.xdist_group("e2e")
 async def test_e2e_add_and_delete_urls(page, e2e_server):
     """
     End-to-end test for the web UI. It tests the following: